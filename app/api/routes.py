@@ -1,13 +1,43 @@
 from fastapi import APIRouter, HTTPException, Depends
-from app.api.schemas import CustomerInput, PredictionOutput, ExplanationOutput, RetentionStrategy
+from fastapi.responses import JSONResponse
+from app.api.schemas import (
+    CustomerInput, PredictionOutput, ExplanationOutput, RetentionStrategy,
+    BatchPredictionInput, ColumnarBatchInput, BatchPredictionOutput, BatchExplanationOutput,
+    AnalysisOutput
+)
 from app.ml.predict import predictor
 from app.explainability.shap_explainer import shap_service
+from app.explainability.global_explainer import global_explainer
 from app.genai.retention_engine import retention_engine
+from app.core.executor import inference_executor, InferenceSaturatedError
+from app.ml.batcher import micro_batcher
+from app.ml.registry import model_registry
+from app.core.config import settings
+from app.core.metrics import stage_timer
+import asyncio
+import numpy as np
 import pandas as pd
+import time
 from app.core.logger import logger
 
 router = APIRouter()
 
+async def _run_inference(fn, *args, timeout: float = None):
+    """
+    Runs blocking model/SHAP work on the inference pool, mapping pool pressure to HTTP errors.
+    """
+    return await _guard_inference(inference_executor.run(fn, *args, timeout=timeout))
+
+async def _guard_inference(awaitable):
+    try:
+        return await awaitable
+    except InferenceSaturatedError:
+        logger.warning("Inference pool saturated, rejecting request")
+        raise HTTPException(status_code=503, detail="Server busy, retry later", headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        logger.error("Inference request timed out")
+        raise HTTPException(status_code=504, detail="Inference timed out")
+
 @router.post("/predict", response_model=PredictionOutput)
 async def predict_churn(customer: CustomerInput):
     """
@@ -15,11 +45,11 @@ async def predict_churn(customer: CustomerInput):
     """
     logger.info("Received prediction request")
     try:
-        # Convert Pydantic to DataFrame (1 row)
-        input_data = customer.dict()
-        df = pd.DataFrame([input_data])
-        
-        result = predictor.predict(df)
+        # Encode the validated record straight to a feature row (no DataFrame)
+        if settings.MICROBATCH_ENABLED:
+            result = await _guard_inference(micro_batcher.submit(customer.dict()))
+        else:
+            result = await _run_inference(predictor.predict_record, customer.dict())
         
         # Add risk factors (placeholder logic if not from SHAP yet, but we'll merge them in flow)
         # Actually the prediction output schema asks for risk factors. 
@@ -27,36 +57,279 @@ async def predict_churn(customer: CustomerInput):
         result['risk_factors'] = [] 
         
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Prediction endpoint error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _score_batch(df: pd.DataFrame, customer_ids):
+    """
+    Runs vectorized scoring over a batch and assembles per-customer results in order.
+    """
+    t0 = time.perf_counter()
+    scores = predictor.predict_batch(df)
+
+    if customer_ids is None:
+        customer_ids = [None] * len(df)
+
+    predictions = [
+        {"customerID": cid, "churn_probability": prob, "churn_prediction": label}
+        for cid, prob, label in zip(customer_ids, scores['churn_probability'], scores['churn_prediction'])
+    ]
+    return {
+        "predictions": predictions,
+        "n_customers": len(predictions),
+        "n_chunks": len(scores['chunk_latency_ms']),
+        "latency_ms": (time.perf_counter() - t0) * 1000,
+        "chunk_latency_ms": scores['chunk_latency_ms']
+    }
+
+def _score_records(records, customer_ids):
+    df = pd.DataFrame(records, columns=list(CustomerInput.__fields__))
+    return _score_batch(df, customer_ids)
+
+@router.post("/predict/batch", response_model=BatchPredictionOutput)
+async def predict_churn_batch(batch: BatchPredictionInput):
+    """
+    Predicts churn probability for a list of customers in one pass.
+    """
+    logger.info(f"Received batch prediction request ({len(batch.customers)} records)")
+    try:
+        records = [customer.dict() for customer in batch.customers]
+        customer_ids = [record.pop('customerID') for record in records]
+        return await _run_inference(_score_records, records, customer_ids, timeout=settings.INFERENCE_BATCH_TIMEOUT_S)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch prediction endpoint error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/batch/columnar", response_model=BatchPredictionOutput)
+async def predict_churn_batch_columnar(batch: ColumnarBatchInput):
+    """
+    Predicts churn probability for a columnar batch (one list of values per feature).
+    """
+    logger.info("Received columnar batch prediction request")
+    try:
+        df = pd.DataFrame({name: batch.columns[name] for name in CustomerInput.__fields__})
+        # Mirror CustomerInput coercion: blank TotalCharges means a brand-new customer
+        df['TotalCharges'] = df['TotalCharges'].replace({" ": 0.0, "": 0.0})
+        for col in ['SeniorCitizen', 'tenure', 'MonthlyCharges', 'TotalCharges']:
+            df[col] = pd.to_numeric(df[col], errors='raise')
+    except (ValueError, TypeError) as e:
+        logger.error(f"Invalid columnar batch: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        return await _run_inference(_score_batch, df, batch.customerID, timeout=settings.INFERENCE_BATCH_TIMEOUT_S)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch prediction endpoint error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/explain", response_model=ExplanationOutput)
 async def explain_churn(customer: CustomerInput):
     """
     Explains the prediction using SHAP.
     """
     try:
-        input_data = customer.dict()
-        df = pd.DataFrame([input_data])
-        explanation = shap_service.explain_local(df)
+        explanation = await _run_inference(shap_service.explain_record, customer.dict())
         
         if "error" in explanation:
             raise HTTPException(status_code=500, detail=explanation['error'])
             
         return explanation
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Explanation endpoint error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _explain_records(records, customer_ids):
+    t0 = time.perf_counter()
+    explanations = shap_service.explain_records(records)
+    return {
+        "explanations": [{"customerID": cid, **explanation} for cid, explanation in zip(customer_ids, explanations)],
+        "n_customers": len(explanations),
+        "latency_ms": (time.perf_counter() - t0) * 1000
+    }
+
+@router.post("/explain/batch", response_model=BatchExplanationOutput)
+async def explain_churn_batch(batch: BatchPredictionInput):
+    """
+    Explains a list of customers with one SHAP pass (cached rows are reused).
+    """
+    logger.info(f"Received batch explanation request ({len(batch.customers)} records)")
+    try:
+        records = [customer.dict() for customer in batch.customers]
+        customer_ids = [record.pop('customerID') for record in records]
+        return await _run_inference(_explain_records, records, customer_ids, timeout=settings.INFERENCE_BATCH_TIMEOUT_S)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch explanation endpoint error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/explain/global")
+async def explain_global(segment: str = None, top: int = 10):
+    """
+    Mean |SHAP| per original feature over the explanation dataset, overall and per segment
+    (e.g. ?segment=Contract), for the active model. Served from cache; on a miss the
+    computation starts in the background and 202 is returned until it is ready. If it failed
+    for the active model, 503 is returned with the error until POST /explain/global/refresh.
+    """
+    try:
+        result = await asyncio.to_thread(global_explainer.get)
+        if result is None:
+            if not global_explainer.computing:
+                error = global_explainer.failure()
+                if error is not None:
+                    raise HTTPException(status_code=503, detail=f"Global explanation failed: {error}. "
+                                                                "POST /api/v1/explain/global/refresh to retry.")
+                global_explainer.start()
+            return JSONResponse(status_code=202, content={"status": "computing"})
+        if segment is not None and segment not in result["segments"]:
+            raise HTTPException(status_code=404, detail=f"Unknown segment {segment!r}, available: {sorted(result['segments'])}")
+
+        def trim(summary):
+            return {**summary, "features": summary["features"][:top]}
+
+        segments = {segment: result["segments"][segment]} if segment else result["segments"]
+        return {
+            **{k: v for k, v in result.items() if k not in ("global", "segments")},
+            "global": trim(result["global"]),
+            "segments": {name: {value: trim(s) for value, s in values.items()} for name, values in segments.items()}
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Global explanation endpoint error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/explain/global/refresh", status_code=202)
+async def refresh_global_explanation():
+    """
+    Recomputes the global explanation for the active model in the background.
+    """
+    global_explainer.start(refresh=True)
+    return {"status": "computing"}
+
+def _analyze_record(record: dict):
+    """
+    Encodes the customer once, scores and explains the same encoded row (sharing one
+    DMatrix with the xgboost backend). The caller adds the retention strategy for the top drivers.
+    """
+    bundle = model_registry.get()
+    if bundle.encoder is not None:
+        with stage_timer("encode"):
+            X = bundle.encoder.encode(record)
+    else:
+        with stage_timer("transform"):
+            X = bundle.preprocessor.transform(pd.DataFrame([record]))
+            X = X.toarray() if hasattr(X, 'toarray') else np.asarray(X, dtype=np.float64)
+
+    dmatrix = None
+    if shap_service.backend == "xgboost":
+        import xgboost
+
+        dmatrix = xgboost.DMatrix(X)
+
+    probability = float(predictor.score_encoded(bundle, X, dmatrix)[0])
+    explanation = shap_service.explain_encoded(bundle, X, dmatrix)[0]
+    # Top 3 SHAP drivers that push risk up are the risk factors
+    risk_factors = [k for k, v in explanation['feature_importance'].items() if v > 0][:3]
+
+    return {
+        "prediction": {
+            "churn_probability": probability,
+            "churn_prediction": predictor.label(probability, bundle.threshold),
+            "risk_factors": risk_factors
+        },
+        "explanation": explanation
+    }
+
+async def _retention_strategy(probability: float, risk_factors: list):
+    # Awaited on the event loop: LLM round trips must not hold an inference worker
+    with stage_timer("retention"):
+        return await retention_engine.agenerate_strategy(probability, risk_factors)
+
+@router.post("/analyze", response_model=AnalysisOutput)
+async def analyze_churn(customer: CustomerInput):
+    """
+    Prediction, SHAP explanation and retention strategy in a single call.
+    """
+    logger.info("Received analysis request")
+    try:
+        analysis = await _run_inference(_analyze_record, customer.dict())
+        prediction = analysis["prediction"]
+        analysis["retention"] = await _retention_strategy(prediction["churn_probability"], prediction["risk_factors"])
+        return analysis
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Analysis endpoint error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/retention", response_model=RetentionStrategy)
 async def generate_retention(churn_prob: float, risk_factors: list[str]):
     """
     Generates a retention strategy.
     """
     try:
-        strategy = retention_engine.generate_strategy(churn_prob, risk_factors)
+        strategy = await _retention_strategy(churn_prob, risk_factors)
         return strategy
     except Exception as e:
         logger.error(f"Retention endpoint error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats")
+async def get_stats():
+    """
+    Runtime statistics for the loaded model, prediction and explanation caches, inference pool,
+    micro-batcher and retention strategy generation.
+    """
+    return {
+        "model": model_registry.stats(),
+        "prediction_cache": predictor.cache.stats() if predictor.cache is not None else {"backend": "none"},
+        "explain_cache": shap_service.cache.stats(),
+        "inference_executor": inference_executor.stats(),
+        "micro_batcher": micro_batcher.stats(),
+        "retention": retention_engine.stats()
+    }
+
+@router.get("/admin/models")
+async def list_models():
+    """
+    Lists registered model versions with their metadata.
+    """
+    return {"active": model_registry.stats(), "versions": model_registry.list_versions()}
+
+@router.post("/admin/models/{version}/activate")
+async def activate_model(version: str):
+    """
+    Loads, warms up and atomically swaps in a registered model version.
+    In-flight requests finish on the previous version.
+    """
+    try:
+        bundle = await asyncio.to_thread(model_registry.activate, version)
+        return bundle.stats()
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Model activation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/admin/models/reload")
+async def reload_model():
+    """
+    Swaps to the version named by the registry's ACTIVE pointer if it changed.
+    """
+    try:
+        bundle = await asyncio.to_thread(model_registry.reload)
+        return bundle.stats()
+    except Exception as e:
+        logger.error(f"Model reload failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
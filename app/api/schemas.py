@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 
 class CustomerInput(BaseModel):
     # Demographics
@@ -33,16 +33,70 @@ class CustomerInput(BaseModel):
             return 0.0
         return v
 
+class CustomerRecord(CustomerInput):
+    customerID: Optional[str] = Field(None, description="Customer identifier, echoed back in batch results")
+
+class BatchPredictionInput(BaseModel):
+    customers: List[CustomerRecord] = Field(..., description="Customer records to score, results keep this order")
+
+class ColumnarBatchInput(BaseModel):
+    columns: Dict[str, List[Any]] = Field(..., description="Feature name -> list of values, one list per CustomerInput field")
+    customerID: Optional[List[str]] = Field(None, description="Customer identifiers, one per row")
+
+    @validator("columns")
+    def check_columns(cls, v):
+        missing = [name for name in CustomerInput.__fields__ if name not in v]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+        lengths = {len(values) for values in v.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        return v
+
+    @validator("customerID")
+    def check_customer_ids(cls, v, values):
+        columns = values.get("columns")
+        if v is not None and columns:
+            n_rows = len(next(iter(columns.values())))
+            if len(v) != n_rows:
+                raise ValueError("customerID must have one entry per row")
+        return v
+
 class PredictionOutput(BaseModel):
     churn_probability: float
     churn_prediction: int
     risk_factors: List[str]
 
+class BatchPredictionItem(BaseModel):
+    customerID: Optional[str] = None
+    churn_probability: float
+    churn_prediction: int
+
+class BatchPredictionOutput(BaseModel):
+    predictions: List[BatchPredictionItem]
+    n_customers: int
+    n_chunks: int
+    latency_ms: float
+    chunk_latency_ms: List[float]
+
 class ExplanationOutput(BaseModel):
     feature_importance: dict
     explanation_text: str
 
+class BatchExplanationItem(ExplanationOutput):
+    customerID: Optional[str] = None
+
+class BatchExplanationOutput(BaseModel):
+    explanations: List[BatchExplanationItem]
+    n_customers: int
+    latency_ms: float
+
 class RetentionStrategy(BaseModel):
     strategy: str
     action_items: List[str]
     email_draft: Optional[str] = None
+
+class AnalysisOutput(BaseModel):
+    prediction: PredictionOutput
+    explanation: ExplanationOutput
+    retention: RetentionStrategy
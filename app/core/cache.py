@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from app.core.logger import logger
+
+# Cache backends share one interface: get(key, default), set(key, value), clear(), stats().
+CACHE_BACKENDS = ("none", "memory", "redis")
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with hit/miss/eviction counters.
+    A `max_size` of 0 disables caching (every lookup is a miss, nothing is stored).
+    With `ttl_s` > 0, entries also expire that many seconds after they were set.
+    """
+
+    def __init__(self, max_size: int, ttl_s: float = 0):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                value, expires_at = self._data[key]
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_s if self.ttl_s > 0 else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class RedisCache:
+    """
+    Same interface as LRUCache on a Redis (or Redis-protocol) server shared by all workers.
+    Values are stored as JSON under `prefix`; size bounds and eviction are left to the
+    server's maxmemory policy. Connection errors count as misses and never fail a request.
+    """
+
+    def __init__(self, url: str, ttl_s: float = 0, prefix: str = "churn:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.url = url
+        self.ttl_s = ttl_s
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key, default=None):
+        try:
+            raw = self._client.get(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache get failed: {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value):
+        try:
+            self._client.set(self.prefix + key, json.dumps(value), ex=int(self.ttl_s) or None)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache set failed: {e}")
+
+    def clear(self):
+        try:
+            keys = list(self._client.scan_iter(match=self.prefix + "*", count=1000))
+            if keys:
+                self._client.delete(*keys)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache clear failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "url": self.url,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+def build_cache(backend: str, max_size: int, ttl_s: float = 0, url: str = None, prefix: str = "churn:"):
+    """
+    Cache for `backend` ("memory" or "redis"), or None for "none".
+    Keys must be strings so every backend can store them.
+    """
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend {backend!r}, expected one of {CACHE_BACKENDS}")
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return RedisCache(url, ttl_s=ttl_s, prefix=prefix)
+    return LRUCache(max_size, ttl_s=ttl_s)
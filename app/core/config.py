@@ -14,5 +14,86 @@ class Settings:
     
     MODEL_PATH: str = os.getenv("MODEL_PATH", "models/churn_model.pkl")
     DATA_PATH: str = os.getenv("DATA_PATH", "app/data/telco_customer_churn.csv")
+    # Cleaned binary copies of datasets (empty = no caching); CSV engine: auto, pyarrow or c
+    DATA_CACHE_DIR: str = os.getenv("DATA_CACHE_DIR", ".cache/data")
+    DATA_LOADER_ENGINE: str = os.getenv("DATA_LOADER_ENGINE", "auto")
+    # Model/explainer warmup at startup: background (default), blocking or lazy (load on first request)
+    STARTUP_WARMUP: str = os.getenv("STARTUP_WARMUP", "background")
+    # Versioned models: <dir>/<version>/model.pkl, <dir>/ACTIVE names the served version
+    MODEL_REGISTRY_DIR: str = os.getenv("MODEL_REGISTRY_DIR", "models/registry")
+    # Poll interval for hot reload when ACTIVE changes (0 = disabled)
+    MODEL_WATCH_INTERVAL_S: float = float(os.getenv("MODEL_WATCH_INTERVAL_S", "0"))
+    # Memory-map NumPy arrays in the model artifact so forked workers share pages
+    MODEL_MMAP: bool = os.getenv("MODEL_MMAP", "false").lower() in ("1", "true", "yes")
+
+    # Overrides the decision threshold stored in the model metadata (unset = use metadata)
+    DECISION_THRESHOLD: str = os.getenv("DECISION_THRESHOLD")
+
+    # XGBoost training: tree method, histogram bins, threads (0 = all cores)
+    TRAIN_TREE_METHOD: str = os.getenv("TRAIN_TREE_METHOD", "hist")
+    TRAIN_MAX_BIN: int = int(os.getenv("TRAIN_MAX_BIN", "256"))
+    TRAIN_NTHREAD: int = int(os.getenv("TRAIN_NTHREAD", "0"))
+    # Encoded train/test matrices cached per dataset (empty = no caching)
+    TRAIN_MATRIX_CACHE_DIR: str = os.getenv("TRAIN_MATRIX_CACHE_DIR", ".cache/matrices")
+
+    # Hyperparameter search (python -m app.ml.train --search); 0 workers = CPU count
+    SEARCH_TRIALS: int = int(os.getenv("SEARCH_TRIALS", "20"))
+    SEARCH_WORKERS: int = int(os.getenv("SEARCH_WORKERS", "0"))
+    SEARCH_MAX_ESTIMATORS: int = int(os.getenv("SEARCH_MAX_ESTIMATORS", "1000"))
+    SEARCH_EARLY_STOPPING_ROUNDS: int = int(os.getenv("SEARCH_EARLY_STOPPING_ROUNDS", "30"))
+
+    # Batch inference
+    BATCH_CHUNK_SIZE: int = int(os.getenv("BATCH_CHUNK_SIZE", "10000"))
+
+    # Inference thread pool (0 workers = min(4, CPU count))
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "0"))
+    INFERENCE_MAX_QUEUE: int = int(os.getenv("INFERENCE_MAX_QUEUE", "64"))
+    INFERENCE_TIMEOUT_S: float = float(os.getenv("INFERENCE_TIMEOUT_S", "10"))
+    INFERENCE_BATCH_TIMEOUT_S: float = float(os.getenv("INFERENCE_BATCH_TIMEOUT_S", "120"))
+
+    # SHAP backend: "shap" (shap.TreeExplainer) or "xgboost" (native pred_contribs, no shap import)
+    EXPLAINER_BACKEND: str = os.getenv("EXPLAINER_BACKEND", "shap")
+    # LRU cache of SHAP explanations (entries, 0 = disabled)
+    EXPLAIN_CACHE_SIZE: int = int(os.getenv("EXPLAIN_CACHE_SIZE", "10000"))
+
+    # Global (population) SHAP explanations: dataset (empty = DATA_PATH), rows (0 = all), segment columns
+    GLOBAL_EXPLAIN_DATA_PATH: str = os.getenv("GLOBAL_EXPLAIN_DATA_PATH", "")
+    GLOBAL_EXPLAIN_MAX_ROWS: int = int(os.getenv("GLOBAL_EXPLAIN_MAX_ROWS", "0"))
+    GLOBAL_EXPLAIN_SEGMENTS: str = os.getenv("GLOBAL_EXPLAIN_SEGMENTS", "Contract,InternetService,PaymentMethod,PaperlessBilling,SeniorCitizen")
+    # Results cached per model version and dataset (empty = memory only); compute at startup
+    GLOBAL_EXPLAIN_CACHE_DIR: str = os.getenv("GLOBAL_EXPLAIN_CACHE_DIR", ".cache/explanations")
+    GLOBAL_EXPLAIN_ON_STARTUP: bool = os.getenv("GLOBAL_EXPLAIN_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+    # Cache of /predict results keyed by customer fields + model version: none, memory or redis
+    PREDICTION_CACHE_BACKEND: str = os.getenv("PREDICTION_CACHE_BACKEND", "none")
+    PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", "100000"))
+    PREDICTION_CACHE_TTL_S: float = float(os.getenv("PREDICTION_CACHE_TTL_S", "0"))
+    PREDICTION_CACHE_REDIS_URL: str = os.getenv("PREDICTION_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Retention strategy generation: mock (rule-based), openai, gemini or stub (app.genai.stub_server)
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "mock")
+    # Model and API base URL (empty = provider default)
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "")
+    LLM_BASE_URL: str = os.getenv("LLM_BASE_URL", "")
+    LLM_TIMEOUT_S: float = float(os.getenv("LLM_TIMEOUT_S", "10"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_POOL_SIZE: int = int(os.getenv("LLM_POOL_SIZE", "16"))
+    # Generated strategies keyed by probability bucket + sorted risk factors: none, memory or redis
+    LLM_CACHE_BACKEND: str = os.getenv("LLM_CACHE_BACKEND", "memory")
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", "10000"))
+    LLM_CACHE_TTL_S: float = float(os.getenv("LLM_CACHE_TTL_S", "86400"))
+    LLM_CACHE_BUCKET: float = float(os.getenv("LLM_CACHE_BUCKET", "0.1"))
+    LLM_CACHE_REDIS_URL: str = os.getenv("LLM_CACHE_REDIS_URL", os.getenv("PREDICTION_CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    # Artificial latency of the stub LLM server (ms)
+    LLM_STUB_DELAY_MS: float = float(os.getenv("LLM_STUB_DELAY_MS", "0"))
+
+    # Latency histogram buckets (seconds) for /metrics
+    METRICS_LATENCY_BUCKETS: str = os.getenv("METRICS_LATENCY_BUCKETS", "0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10")
+
+    # Micro-batching of concurrent /predict requests (opt-in)
+    MICROBATCH_ENABLED: bool = os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+    MICROBATCH_MAX_BATCH_SIZE: int = int(os.getenv("MICROBATCH_MAX_BATCH_SIZE", "32"))
+    MICROBATCH_MAX_WAIT_MS: float = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+    MICROBATCH_HISTOGRAM_BUCKETS: str = os.getenv("MICROBATCH_HISTOGRAM_BUCKETS", "1,2,4,8,16,32,64")
 
 settings = Settings()
@@ -0,0 +1,75 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.core.logger import logger
+
+class InferenceSaturatedError(Exception):
+    """
+    Raised when the inference pool already has the maximum number of queued jobs.
+    """
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for CPU-heavy model and SHAP work, so async handlers never
+    block the event loop. XGBoost, NumPy and SHAP release the GIL in their native
+    code, which makes threads sufficient here without paying process IPC costs.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout_s: float):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout_s = timeout_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def run(self, fn, *args, timeout: float = None, **kwargs):
+        """
+        Runs `fn(*args, **kwargs)` on the pool and awaits the result.
+
+        Raises InferenceSaturatedError if running + queued jobs exceed the configured
+        limit, and asyncio.TimeoutError if the job does not finish within the timeout.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                raise InferenceSaturatedError("Inference queue is full")
+            self._in_flight += 1
+
+        try:
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+        # Count the job until the worker actually finishes, even if the caller times out,
+        # so abandoned work still occupies the queue budget
+        future.add_done_callback(lambda _: self._release())
+
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout_s)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight
+        }
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Inference executor shut down.")
+
+inference_executor = InferenceExecutor(
+    max_workers=settings.INFERENCE_WORKERS or min(4, os.cpu_count() or 1),
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    timeout_s=settings.INFERENCE_TIMEOUT_S
+)
@@ -0,0 +1,236 @@
+"""
+Minimal Prometheus-style metrics: counters, gauges and histograms with labels, rendered in
+the Prometheus text exposition format by `render()` (served on GET /metrics).
+
+Timing a stage costs two perf_counter calls, a dict lookup and a short locked update:
+
+    with stage_timer("predict_proba"):
+        probabilities = classifier.predict_proba(X)
+"""
+import bisect
+import threading
+import time
+from app.core.config import settings
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """
+        The child series for these label values (created on first use).
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, _format_labels(self.labelnames, values), self.labelnames, values))
+        return lines
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def render(self, name, labels, labelnames, values):
+        return [f"{name}{labels} {self.value}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self) -> tuple:
+        """
+        `(buckets, sum, count)` with cumulative counts per upper bound (Prometheus `le` style, "+Inf" last).
+        """
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        buckets, cumulative = {}, 0
+        for bound, count in zip(list(self.bounds) + ["+Inf"], counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return buckets, total, cumulative
+
+    def render(self, name, labels, labelnames, values):
+        buckets, total, count = self.snapshot()
+        lines = []
+        for bound, n in buckets.items():
+            bucket_labels = _format_labels(labelnames, values, 'le="%s"' % bound)
+            lines.append(f"{name}_bucket{bucket_labels} {n}")
+        lines.append(f"{name}_sum{labels} {total}")
+        lines.append(f"{name}_count{labels} {count}")
+        return lines
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets or LATENCY_BUCKETS))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+class StageTimer:
+    """
+    Context manager observing the elapsed wall time of its block into a histogram child.
+    """
+    __slots__ = ("_child", "_t0")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._t0)
+        return False
+
+class CacheCollector:
+    """
+    Exports the counters of tracked caches (app/core/cache.py) from their `stats()` at render
+    time, so cache lookups keep their single locked update.
+    """
+    COUNTERS = (
+        ("hits", "Cache lookups that found a value."),
+        ("misses", "Cache lookups that found nothing (including expired entries)."),
+        ("evictions", "Entries evicted to stay within the cache size."),
+        ("expirations", "Entries dropped because their TTL passed."),
+        ("errors", "Cache backend errors (counted as misses).")
+    )
+
+    def __init__(self):
+        self._caches = {}
+
+    def track(self, name: str, cache):
+        """
+        Exports `cache` as cache="name" (a later cache with the same name replaces it). Returns the cache.
+        """
+        if cache is not None:
+            self._caches[name] = cache
+        return cache
+
+    def render(self) -> list:
+        stats = {name: cache.stats() for name, cache in sorted(self._caches.items())}
+        families = [(f"churn_cache_{field}_total", "counter", field, doc) for field, doc in self.COUNTERS]
+        families.append(("churn_cache_entries", "gauge", "size", "Entries currently held by in-process caches."))
+        lines = []
+        for metric, kind, field, documentation in families:
+            series = [(name, s[field]) for name, s in stats.items() if field in s]
+            if series:
+                lines.extend([f"# HELP {metric} {documentation}", f"# TYPE {metric} {kind}"])
+                lines.extend(f'{metric}{{cache="{_escape(name)}"}} {float(value)}' for name, value in series)
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+LATENCY_BUCKETS = tuple(float(b) for b in settings.METRICS_LATENCY_BUCKETS.split(","))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics_registry = MetricsRegistry()
+
+REQUESTS_TOTAL = metrics_registry.register(Counter(
+    "churn_http_requests_total", "HTTP requests by method, route and status code.", ("method", "endpoint", "status")
+))
+REQUEST_SECONDS = metrics_registry.register(Histogram(
+    "churn_http_request_duration_seconds", "End-to-end HTTP request latency by route.", ("method", "endpoint")
+))
+STAGE_SECONDS = metrics_registry.register(Histogram(
+    "churn_stage_duration_seconds", "Latency of internal inference stages.", ("stage",)
+))
+MODEL_LOAD_SECONDS = metrics_registry.register(Gauge(
+    "churn_model_load_seconds", "Time to load each model version's artifact.", ("version",)
+))
+MODEL_WARMUP_SECONDS = metrics_registry.register(Gauge(
+    "churn_model_warmup_seconds", "Time to warm up each model version before serving it.", ("version",)
+))
+
+LLM_REQUESTS_TOTAL = metrics_registry.register(Counter(
+    "churn_llm_requests_total", "Retention strategy lookups by LLM provider and outcome (ok, cache_hit, timeout, error).",
+    ("provider", "outcome")
+))
+MICROBATCH_SIZE = metrics_registry.register(Histogram(
+    "churn_microbatch_size", "Records scored per micro-batch.",
+    buckets=[int(b) for b in settings.MICROBATCH_HISTOGRAM_BUCKETS.split(",") if b.strip()]
+))
+CACHES = metrics_registry.register(CacheCollector())
+
+def stage_timer(stage: str) -> StageTimer:
+    """
+    Times a block as one observation of churn_stage_duration_seconds{stage=...}.
+    """
+    return StageTimer(STAGE_SECONDS.labels(stage))
+
+def render() -> str:
+    return metrics_registry.render()
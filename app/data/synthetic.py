@@ -0,0 +1,192 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.core.logger import logger
+from app.data.loader import CATEGORICAL_COLUMNS, NUMERIC_DTYPES, clean_frame
+
+DEFAULT_CHUNK_SIZE = 250_000
+OUTPUT_FORMATS = ("csv", "parquet")
+
+# Log-odds contributions of well-known churn drivers used to label synthetic customers.
+# The intercept is calibrated so the synthetic churn rate matches the seed's.
+CHURN_DRIVERS = {
+    ('Contract', 'Month-to-month'): 1.2,
+    ('Contract', 'Two year'): -1.2,
+    ('InternetService', 'Fiber optic'): 0.6,
+    ('InternetService', 'No'): -0.6,
+    ('PaymentMethod', 'Electronic check'): 0.5,
+    ('TechSupport', 'Yes'): -0.4,
+    ('OnlineSecurity', 'Yes'): -0.4,
+    ('PaperlessBilling', 'Yes'): 0.2
+}
+SENIOR_CITIZEN_WEIGHT = 0.3
+TENURE_WEIGHT = -0.035  # per month above the seed mean
+MONTHLY_CHARGES_WEIGHT = 0.01  # per currency unit above the seed mean
+
+class SyntheticCustomerGenerator:
+    """
+    Vectorized sampler of customers shaped like the seed dataset (and CustomerInput).
+
+    Each synthetic customer starts from a random seed row, which keeps the seed's joint
+    distribution of categorical values. Every categorical cell is then redrawn from its
+    column's marginal with probability `mix`, so new combinations appear. Tenure and
+    MonthlyCharges are jittered by `jitter` seed standard deviations and clipped to the seed
+    range. TotalCharges keeps the seed row's ratio to tenure * MonthlyCharges. Churn is drawn
+    from a logistic model over CHURN_DRIVERS.
+    """
+
+    def __init__(self, seed_df: pd.DataFrame, mix: float = 0.3, jitter: float = 0.1, random_state: int = 42):
+        seed_df = clean_frame(seed_df.copy())
+        self.mix = mix
+        self.jitter = jitter
+        self.random_state = random_state
+        self.columns = [c for c in seed_df.columns if c != 'customerID']
+        self.n_seed = len(seed_df)
+
+        self.categories = {}
+        self.codes = {}
+        self.marginals = {}
+        for col in CATEGORICAL_COLUMNS:
+            values = pd.Categorical(seed_df[col].astype(str))
+            self.categories[col] = values.categories
+            self.codes[col] = values.codes.astype(np.int16)
+            self.marginals[col] = np.bincount(values.codes, minlength=len(values.categories)) / len(values)
+
+        self.senior = seed_df['SeniorCitizen'].to_numpy(np.int8)
+        self.numeric = {}
+        for col in ('tenure', 'MonthlyCharges'):
+            values = seed_df[col].to_numpy(np.float64)
+            self.numeric[col] = (values, values.std(), values.min(), values.max())
+        expected = seed_df['tenure'].to_numpy(np.float64) * seed_df['MonthlyCharges'].to_numpy(np.float64)
+        actual = seed_df['TotalCharges'].to_numpy(np.float64)
+        self.total_ratio = np.divide(actual, expected, out=np.ones_like(actual), where=expected > 0)
+
+        self.churn_rate = float((seed_df['Churn'].astype(str) == 'Yes').mean()) if 'Churn' in seed_df else 0.25
+        self.intercept = 0.0
+        self.intercept = self._calibrate_intercept()
+
+    @classmethod
+    def from_csv(cls, path: str = None, **kwargs) -> "SyntheticCustomerGenerator":
+        return cls(pd.read_csv(path or settings.DATA_PATH), **kwargs)
+
+    def _features(self, n: int, rng: np.random.Generator) -> dict:
+        rows = rng.integers(0, self.n_seed, n)
+        columns = {}
+        for col in CATEGORICAL_COLUMNS:
+            codes = self.codes[col][rows]
+            redraw = rng.random(n) < self.mix
+            codes[redraw] = rng.choice(len(self.marginals[col]), size=int(redraw.sum()), p=self.marginals[col])
+            columns[col] = codes
+
+        columns['SeniorCitizen'] = self.senior[rows]
+        values, std, low, high = self.numeric['tenure']
+        tenure = np.rint(np.clip(values[rows] + rng.normal(0, self.jitter * std, n), low, high))
+        values, std, low, high = self.numeric['MonthlyCharges']
+        monthly = np.round(np.clip(values[rows] + rng.normal(0, self.jitter * std, n), low, high), 2)
+        columns['tenure'] = tenure.astype(NUMERIC_DTYPES['tenure'])
+        columns['MonthlyCharges'] = monthly.astype(NUMERIC_DTYPES['MonthlyCharges'])
+        columns['TotalCharges'] = np.round(tenure * monthly * self.total_ratio[rows], 2).astype(NUMERIC_DTYPES['TotalCharges'])
+        return columns
+
+    def _churn_logit(self, columns: dict) -> np.ndarray:
+        logit = np.full(len(columns['tenure']), self.intercept)
+        for (col, value), weight in CHURN_DRIVERS.items():
+            categories = self.categories[col]
+            if value in categories:
+                logit += weight * (columns[col] == categories.get_loc(value))
+        logit += SENIOR_CITIZEN_WEIGHT * columns['SeniorCitizen']
+        logit += TENURE_WEIGHT * (columns['tenure'] - self.numeric['tenure'][0].mean())
+        logit += MONTHLY_CHARGES_WEIGHT * (columns['MonthlyCharges'] - self.numeric['MonthlyCharges'][0].mean())
+        return logit
+
+    def _calibrate_intercept(self, n: int = 100_000) -> float:
+        """
+        Bisects the intercept so the expected churn rate on a pilot sample matches the seed.
+        """
+        logit = self._churn_logit(self._features(n, np.random.default_rng(self.random_state)))
+        low, high = -20.0, 20.0
+        for _ in range(50):
+            mid = (low + high) / 2
+            if (1 / (1 + np.exp(-(logit + mid)))).mean() < self.churn_rate:
+                low = mid
+            else:
+                high = mid
+        return (low + high) / 2
+
+    def sample(self, n: int, start: int = 0, rng: np.random.Generator = None) -> pd.DataFrame:
+        """
+        `n` synthetic customers with the seed's columns, customerIDs numbered from `start`.
+        """
+        rng = rng or np.random.default_rng(self.random_state)
+        columns = self._features(n, rng)
+        churn = rng.random(n) < 1 / (1 + np.exp(-self._churn_logit(columns)))
+
+        frame = {'customerID': np.char.add(np.char.zfill(np.arange(start, start + n).astype(str), 9), "-SYN")}
+        for col in self.columns:
+            if col in CATEGORICAL_COLUMNS:
+                frame[col] = pd.Categorical.from_codes(columns[col], self.categories[col])
+            elif col == 'Churn':
+                frame[col] = pd.Categorical.from_codes(churn.astype(np.int8), ['No', 'Yes'])
+            else:
+                frame[col] = columns[col]
+        return pd.DataFrame(frame)
+
+    def iter_chunks(self, n_rows: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Yields DataFrames of at most `chunk_size` rows until `n_rows` have been produced.
+        """
+        rng = np.random.default_rng(self.random_state)
+        for start in range(0, n_rows, chunk_size):
+            yield self.sample(min(chunk_size, n_rows - start), start=start, rng=rng)
+
+def write_synthetic(path: str, n_rows: int, chunk_size: int = DEFAULT_CHUNK_SIZE, seed_path: str = None,
+                    output_format: str = None, **kwargs) -> dict:
+    """
+    Streams `n_rows` synthetic customers to a CSV or Parquet file (format from the extension
+    unless given) one chunk at a time, so memory stays bounded by `chunk_size`.
+    """
+    output_format = output_format or ("parquet" if path.endswith(".parquet") else "csv")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+    generator = SyntheticCustomerGenerator.from_csv(seed_path, **kwargs)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    t0 = time.perf_counter()
+    writer = None
+    try:
+        for i, chunk in enumerate(generator.iter_chunks(n_rows, chunk_size)):
+            if output_format == "csv":
+                chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    seconds = time.perf_counter() - t0
+    logger.info(f"Wrote {n_rows} synthetic customers to {path} in {seconds:.2f}s ({n_rows / seconds:,.0f} rows/s)")
+    return {"path": path, "rows": n_rows, "format": output_format, "seconds": seconds, "rows_per_s": n_rows / seconds}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic customers shaped like the seed dataset.")
+    parser.add_argument("output", help="Destination .csv or .parquet file")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed-data", help="CSV to imitate (default: DATA_PATH)")
+    parser.add_argument("--mix", type=float, default=0.3, help="Probability of redrawing each categorical value from its marginal")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Numeric noise in seed standard deviations")
+    parser.add_argument("--random-state", type=int, default=42)
+    args = parser.parse_args()
+
+    write_synthetic(args.output, args.rows, chunk_size=args.chunk_size, seed_path=args.seed_data,
+                    mix=args.mix, jitter=args.jitter, random_state=args.random_state)
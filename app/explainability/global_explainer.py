@@ -0,0 +1,220 @@
+"""
+Population-level explanations: mean |SHAP| per original feature, overall and per segment.
+
+SHAP values are computed over a dataset in vectorized chunks. One-hot columns are summed back
+into their source column (SHAP values are additive), so "Contract" gets a single importance.
+Results are cached per model version and dataset, in memory and as JSON files, and served by
+GET /api/v1/explain/global.
+
+    python -m app.explainability.global_explainer --data customers.parquet --max-rows 500000
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import stage_timer
+from app.data.loader import clean_frame
+from app.explainability.shap_explainer import shap_service
+from app.ml.matrix_cache import dataset_key
+from app.ml.registry import model_registry
+from app.ml.score import iter_chunks
+
+class _Aggregate:
+    """
+    Running sums for one population: row count, predicted churn, signed and absolute SHAP per source feature.
+    """
+
+    def __init__(self, n_features: int):
+        self.rows = 0
+        self.churn_probability = 0.0
+        self.shap = np.zeros(n_features)
+        self.abs_shap = np.zeros(n_features)
+
+    def add(self, probabilities, shap_values, abs_shap):
+        self.rows += len(probabilities)
+        self.churn_probability += float(probabilities.sum())
+        self.shap += shap_values.sum(axis=0)
+        self.abs_shap += abs_shap.sum(axis=0)
+
+    def summary(self, feature_names: list) -> dict:
+        rows = max(self.rows, 1)
+        order = np.argsort(-self.abs_shap)
+        return {
+            "rows": self.rows,
+            "mean_churn_probability": self.churn_probability / rows,
+            "features": [
+                {"feature": feature_names[i], "mean_abs_shap": float(self.abs_shap[i] / rows), "mean_shap": float(self.shap[i] / rows)}
+                for i in order
+            ]
+        }
+
+class GlobalExplainer:
+    def __init__(self, explainer=shap_service, registry=model_registry, cache_dir: str = None):
+        self.explainer = explainer
+        self.registry = registry
+        self.cache_dir = settings.GLOBAL_EXPLAIN_CACHE_DIR if cache_dir is None else cache_dir
+        self._results = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        # Error of the last failed background run per result key; not retried until a refresh
+        self._failures = {}
+        self.registry.add_listener(self._on_model_swap)
+
+    def _on_model_swap(self, bundle):
+        # Results are keyed by model version; the old ones can no longer be requested
+        self._results.clear()
+        self._failures.clear()
+
+    def _defaults(self, data_path: str, segments: list, max_rows: int) -> tuple:
+        data_path = data_path or settings.GLOBAL_EXPLAIN_DATA_PATH or settings.DATA_PATH
+        segments = segments if segments is not None else settings.GLOBAL_EXPLAIN_SEGMENTS.split(",")
+        max_rows = settings.GLOBAL_EXPLAIN_MAX_ROWS if max_rows is None else max_rows
+        return data_path, segments, max_rows
+
+    def _key(self, version: str, data_path: str, segments: list, max_rows: int) -> str:
+        return f"{version}-{dataset_key(data_path, segments=segments, max_rows=max_rows)}"
+
+    def _active_key(self, data_path: str = None, segments: list = None, max_rows: int = None) -> str:
+        return self._key(self.registry.get().version, *self._defaults(data_path, segments, max_rows))
+
+    def _cache_file(self, key: str):
+        return os.path.join(self.cache_dir, f"{key}.json") if self.cache_dir else None
+
+    def compute(self, data_path: str = None, segments: list = None, max_rows: int = None, chunk_size: int = None) -> dict:
+        """
+        Explains up to `max_rows` rows of `data_path` (0 = all) with the active model and
+        aggregates per source feature, overall and for each value of each segment column.
+        """
+        data_path, segments, max_rows = self._defaults(data_path, segments, max_rows)
+        chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
+        bundle = self.registry.get()
+
+        sources = self.explainer.source_features(bundle)
+        feature_names = list(dict.fromkeys(sources))
+        # (n_encoded, n_source) 0/1 matrix summing one-hot contributions into their source column
+        mapping = np.zeros((len(sources), len(feature_names)))
+        mapping[np.arange(len(sources)), [feature_names.index(s) for s in sources]] = 1.0
+
+        overall = _Aggregate(len(feature_names))
+        by_segment = {segment: {} for segment in segments}
+        t0 = time.perf_counter()
+        for chunk in iter_chunks(data_path, chunk_size):
+            if max_rows:
+                chunk = chunk.iloc[:max_rows - overall.rows]
+                if chunk.empty:
+                    break
+            chunk = clean_frame(chunk)
+            with stage_timer("transform"):
+                X = bundle.preprocessor.transform(chunk)
+                X = X.toarray() if hasattr(X, 'toarray') else np.asarray(X, dtype=np.float64)
+            with stage_timer("predict_proba"):
+                probabilities = bundle.classifier.predict_proba(X)[:, 1]
+            with stage_timer("shap"):
+                shap_values = self.explainer.contributions(bundle, X) @ mapping
+            abs_shap = np.abs(shap_values)
+
+            overall.add(probabilities, shap_values, abs_shap)
+            for segment in segments:
+                values = chunk[segment].astype(str).to_numpy()
+                for value in np.unique(values):
+                    rows = values == value
+                    aggregate = by_segment[segment].setdefault(value, _Aggregate(len(feature_names)))
+                    aggregate.add(probabilities[rows], shap_values[rows], abs_shap[rows])
+            logger.info(f"Global explanation: {overall.rows} rows explained ({overall.rows / (time.perf_counter() - t0):,.0f} rows/s)")
+
+        return {
+            "model_version": bundle.version,
+            "data_path": data_path,
+            "backend": self.explainer.backend,
+            "computed_at": datetime.now(timezone.utc).isoformat(),
+            "seconds": round(time.perf_counter() - t0, 3),
+            "global": overall.summary(feature_names),
+            "segments": {
+                segment: {value: aggregate.summary(feature_names) for value, aggregate in sorted(values.items())}
+                for segment, values in by_segment.items()
+            }
+        }
+
+    def get(self, data_path: str = None, segments: list = None, max_rows: int = None, compute: bool = False,
+            refresh: bool = False):
+        """
+        Cached result for the active model (from memory, then disk), or None.
+        With `compute`, a miss is computed synchronously and cached; `refresh` also recomputes a hit.
+        """
+        data_path, segments, max_rows = self._defaults(data_path, segments, max_rows)
+        key = self._key(self.registry.get().version, data_path, segments, max_rows)
+
+        result = None if refresh else self._results.get(key)
+        cache_file = self._cache_file(key)
+        if result is None and not refresh and cache_file and os.path.exists(cache_file):
+            with open(cache_file) as f:
+                result = self._results[key] = json.load(f)
+        if result is None and compute:
+            with self._lock:
+                result = None if refresh else self._results.get(key)
+                if result is None:
+                    result = self.compute(data_path, segments, max_rows)
+                    self._save(key, result)
+        return result
+
+    def _save(self, key: str, result: dict):
+        self._results[key] = result
+        cache_file = self._cache_file(key)
+        if cache_file:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{cache_file}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(result, f)
+            os.replace(tmp, cache_file)
+        logger.info(f"Global explanation for model {result['model_version']} cached ({result['global']['rows']} rows, {result['seconds']}s)")
+
+    @property
+    def computing(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def failure(self):
+        """
+        Error of the last background run for the active model and default dataset, or None.
+        """
+        return self._failures.get(self._active_key())
+
+    def start(self, refresh: bool = False) -> bool:
+        """
+        Computes the default global explanation in a background thread. No-op if one is running,
+        or if the last run for the active model failed and this is not a `refresh`.
+        Returns whether a computation was started.
+        """
+        if self.computing:
+            return False
+        key = self._active_key()
+        if not refresh and key in self._failures:
+            return False
+        self._failures.pop(key, None)
+        self._thread = threading.Thread(target=self._run, args=(key, refresh), name="global-explanation", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, key: str, refresh: bool):
+        try:
+            self.get(compute=True, refresh=refresh)
+        except Exception as e:
+            self._failures[key] = str(e)
+            logger.error(f"Global explanation failed: {e}")
+
+global_explainer = GlobalExplainer()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute and cache the global SHAP explanation for the active model.")
+    parser.add_argument("--data", help="CSV or Parquet file to explain (default: GLOBAL_EXPLAIN_DATA_PATH or DATA_PATH)")
+    parser.add_argument("--segments", help="Comma-separated segment columns (default: GLOBAL_EXPLAIN_SEGMENTS)")
+    parser.add_argument("--max-rows", type=int, help="Rows to explain, 0 = all (default: GLOBAL_EXPLAIN_MAX_ROWS)")
+    args = parser.parse_args()
+
+    result = global_explainer.get(args.data, args.segments.split(",") if args.segments else None, args.max_rows, compute=True)
+    print(json.dumps({"model_version": result["model_version"], "rows": result["global"]["rows"],
+                      "seconds": result["seconds"], "top_features": result["global"]["features"][:10]}, indent=2))
@@ -1,85 +1,225 @@
-import shap
+import hashlib
 import pandas as pd
 import numpy as np
-import joblib
 import logging
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.cache import LRUCache
+from app.core.metrics import CACHES, stage_timer
+from app.ml.registry import model_registry
+
+EXPLAINER_BACKENDS = ("shap", "xgboost")
 
 class ShapExplainer:
-    def __init__(self):
-        self.model = None
-        self.preprocessor = None
-        self.explainer = None
-        self._load_resources()
+    def __init__(self, registry=model_registry, backend: str = None):
+        self.registry = registry
+        # Explanations keyed by (model version, hash of the encoded feature row)
+        self.cache = LRUCache(settings.EXPLAIN_CACHE_SIZE)
+        self.backend = backend or settings.EXPLAINER_BACKEND
+        if self.backend not in EXPLAINER_BACKENDS:
+            raise ValueError(f"Unknown EXPLAINER_BACKEND {self.backend!r}, expected one of {EXPLAINER_BACKENDS}")
+        self.registry.add_listener(self._on_model_swap)
 
     def _load_resources(self):
+        """
+        Returns the shared model bundle (or None if the model cannot be loaded).
+        Each explanation takes one snapshot so a model swap never mixes versions mid-request.
+        """
         try:
-            full_pipeline = joblib.load(settings.MODEL_PATH)
-            self.model = full_pipeline.named_steps['classifier']
-            self.preprocessor = full_pipeline.named_steps['preprocessor']
-            logger.info("SHAP Explainer resources loaded.")
+            return self.registry.get()
         except Exception as e:
             logger.error(f"Failed to load model for SHAP: {e}")
+            return None
+
+    def _bundle(self):
+        bundle = self._load_resources()
+        if bundle is None:
+            raise ValueError("Model not loaded.")
+        return bundle
+
+    @property
+    def model(self):
+        bundle = self._load_resources()
+        return bundle.classifier if bundle else None
+
+    @property
+    def preprocessor(self):
+        bundle = self._load_resources()
+        return bundle.preprocessor if bundle else None
 
     def explain_local(self, input_df: pd.DataFrame):
         """
         Returns feature importance for a specific prediction.
         """
-        if self.model is None:
-            self._load_resources()
-        
         try:
+            bundle = self._bundle()
             # Transform input using the pipeline's preprocessor
-            X_encoded = self.preprocessor.transform(input_df)
-            
-            # Create explainer if not cached (TreeExplainer is fast enough to init usually, 
-            # but for speed we could cache it if we had a background dataset)
-            # using TreeExplainer as we use XGBoost
-            if self.explainer is None:
-                self.explainer = shap.TreeExplainer(self.model)
-            
-            shap_values = self.explainer.shap_values(X_encoded)
-            
-            # Get feature names from preprocessor
-            feature_names = self._get_feature_names()
-            
-            # Map values to features (handling the list return from shap_values for classification)
-            # XGBoost binary classification returns a single array, sklearn RF returns list.
-            # Assuming XGBoost here based on train.py
-            
-            if isinstance(shap_values, list):
-                vals = shap_values[1][0] # Positive class
-            else:
-                vals = shap_values[0]
-
-            # Create a dict of feature: importance
-            # We sort by absolute value
-            feature_importance = dict(zip(feature_names, vals))
-            sorted_importance = sorted(feature_importance.items(), key=lambda x: abs(x[1]), reverse=True)
-            
-            # Return top 5 drivers
-            top_drivers = {k: float(v) for k, v in sorted_importance[:5]}
-            
-            # Generate simple text explanation
-            explanation_text = "Key factors: " + ", ".join([f"{k} ({'increases' if v > 0 else 'decreases'} risk)" for k, v in sorted_importance[:3]])
-            
-            return {
-                "feature_importance": top_drivers,
-                "explanation_text": explanation_text
-            }
-            
+            with stage_timer("transform"):
+                X_encoded = bundle.preprocessor.transform(input_df)
+            return self._explain_encoded(bundle, X_encoded)
+        except Exception as e:
+            logger.error(f"SHAP explanation failed: {e}")
+            return {"error": "Could not generate explanation"}
+
+    def explain_record(self, record: dict):
+        """
+        Same as explain_local for a single raw record, using the compiled feature
+        encoder instead of building a DataFrame when available.
+        """
+        try:
+            bundle = self._bundle()
+            if bundle.encoder is None:
+                with stage_timer("dataframe_build"):
+                    df = pd.DataFrame([record])
+                return self.explain_local(df)
+            with stage_timer("encode"):
+                X_encoded = bundle.encoder.encode(record)
+            return self._explain_encoded(bundle, X_encoded)
         except Exception as e:
             logger.error(f"SHAP explanation failed: {e}")
             return {"error": "Could not generate explanation"}
 
-    def _get_feature_names(self):
+    def explain_records(self, records):
+        """
+        Explains a list of raw records with one SHAP pass over all uncached rows.
+        Returns one explanation dict per record, in order.
+        """
+        bundle = self._bundle()
+        if bundle.encoder is None:
+            with stage_timer("transform"):
+                X_encoded = bundle.preprocessor.transform(pd.DataFrame(records))
+        else:
+            with stage_timer("encode"):
+                X_encoded = bundle.encoder.encode_many(records)
+        return self._explain_rows(bundle, X_encoded)
+
+    def warmup(self):
+        """
+        Builds the TreeExplainer for the active model up front, so the first /explain
+        request does not pay for it.
+        """
+        bundle = self._load_resources()
+        if bundle is not None and self.backend == "shap":
+            self._get_explainer(bundle)
+
+    def _on_model_swap(self, bundle):
+        # Explanations are keyed by model version; drop the old ones and prepare the new explainer
+        self.cache.clear()
+        if self.backend == "shap":
+            self._get_explainer(bundle)
+
+    def contributions(self, bundle, X_encoded, dmatrix=None):
+        """
+        Per-feature SHAP contributions (n_rows, n_features) for the positive class.
+
+        The "xgboost" backend asks the booster for exact TreeSHAP values
+        (`pred_contribs=True`) and can reuse a DMatrix already built for scoring.
+        The "shap" backend uses shap.TreeExplainer.
+        """
+        if self.backend == "xgboost":
+            import xgboost
+
+            if dmatrix is None:
+                dmatrix = xgboost.DMatrix(X_encoded)
+            # Last column is the bias term (expected value), not a feature
+            return bundle.classifier.get_booster().predict(dmatrix, pred_contribs=True)[:, :-1]
+
+        shap_values = self._get_explainer(bundle).shap_values(X_encoded)
+        # Map values to features (handling the list return from shap_values for classification)
+        # XGBoost binary classification returns a single array, sklearn RF returns list.
+        # Assuming XGBoost here based on train.py
+        if isinstance(shap_values, list):
+            shap_values = shap_values[1] # Positive class
+        return shap_values
+
+    def _get_explainer(self, bundle):
+        """
+        TreeExplainer for the bundle's classifier, built once and kept with the bundle.
+        """
+        explainer = bundle.derived.get('shap_explainer')
+        if explainer is None:
+            # Imported here: shap pulls in numba/matplotlib, which the xgboost backend never needs
+            import shap
+
+            explainer = shap.TreeExplainer(bundle.classifier)
+            bundle.derived['shap_explainer'] = explainer
+            logger.info(f"SHAP TreeExplainer built for model {bundle.version}.")
+        return explainer
+
+    def _explain_encoded(self, bundle, X_encoded):
+        """
+        Computes the top SHAP drivers for an already-encoded row.
+        """
+        return self._explain_rows(bundle, X_encoded)[0]
+
+    def explain_encoded(self, bundle, X_encoded, dmatrix=None):
+        """
+        Explains rows that the caller has already encoded (and possibly scored) with `bundle`.
+        `dmatrix` is reused by the xgboost backend when every row needs computing.
+        """
+        return self._explain_rows(bundle, X_encoded, dmatrix)
+
+    def _explain_rows(self, bundle, X_encoded, dmatrix=None):
+        """
+        Explains every row of an encoded matrix. Rows already in the cache are reused,
+        the rest are explained together in a single shap_values call.
+        """
+        if hasattr(X_encoded, 'toarray'):
+            X_encoded = X_encoded.toarray()
+        X_encoded = np.asarray(X_encoded, dtype=np.float64)
+
+        keys = [(bundle.version, self.backend, hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()) for row in X_encoded]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+
+        if missing:
+            # A prebuilt DMatrix only covers the full matrix
+            dmatrix = dmatrix if len(missing) == len(keys) else None
+            with stage_timer("shap"):
+                shap_values = self.contributions(bundle, X_encoded[missing], dmatrix)
+
+            # Get feature names from preprocessor
+            feature_names = self.feature_names(bundle)
+            with stage_timer("explain_format"):
+                for i, vals in zip(missing, shap_values):
+                    results[i] = self._format_explanation(feature_names, vals)
+                    self.cache.set(keys[i], results[i])
+
+        return results
+
+    def _format_explanation(self, feature_names, vals):
+        # Create a dict of feature: importance
+        # We sort by absolute value
+        feature_importance = dict(zip(feature_names, vals))
+        sorted_importance = sorted(feature_importance.items(), key=lambda x: abs(x[1]), reverse=True)
+        
+        # Return top 5 drivers
+        top_drivers = {k: float(v) for k, v in sorted_importance[:5]}
+        
+        # Generate simple text explanation
+        explanation_text = "Key factors: " + ", ".join([f"{k} ({'increases' if v > 0 else 'decreases'} risk)" for k, v in sorted_importance[:3]])
+        
+        return {
+            "feature_importance": top_drivers,
+            "explanation_text": explanation_text
+        }
+
+    def feature_names(self, bundle):
+        """
+        Encoded feature names for the bundle, in the same order as the contribution columns.
+        """
+        if bundle.encoder is not None:
+            return bundle.encoder.feature_names
+        return self._get_feature_names(bundle.preprocessor)
+
+    def _get_feature_names(self, preprocessor):
         """
         Extracts feature names from the column transformer.
+        Raises ValueError if they cannot be determined: placeholder names would mislabel every explanation.
         """
         output_features = []
         try:
-            transformers = self.preprocessor.transformers_
+            transformers = preprocessor.transformers_
             for name, estimator, columns in transformers:
                 if name == 'num':
                     output_features.extend(columns)
@@ -90,9 +230,30 @@ class ShapExplainer:
                     else:
                         output_features.extend(estimator.get_feature_names(columns))
         except Exception as e:
-            logger.warning(f"Could not extract feature names: {e}")
-            # Fallback
-            output_features = [f"Feature {i}" for i in range(100)] 
+            logger.error(f"Could not extract feature names: {e}")
+            raise ValueError(f"Could not extract feature names from the preprocessor: {e}")
         return output_features
 
+    def source_features(self, bundle):
+        """
+        Original (pre-one-hot) column for each encoded feature, in contribution column order.
+        """
+        sources = bundle.derived.get('source_features')
+        if sources is None:
+            sources = []
+            for name, estimator, columns in bundle.preprocessor.transformers_:
+                if name == 'num':
+                    sources.extend(columns)
+                elif name == 'cat':
+                    drop_idx = getattr(estimator, 'drop_idx_', None)
+                    for i, (column, categories) in enumerate(zip(columns, estimator.categories_)):
+                        dropped = drop_idx is not None and drop_idx[i] is not None
+                        sources.extend([column] * (len(categories) - int(dropped)))
+            n_features = len(self.feature_names(bundle))
+            if len(sources) != n_features:
+                raise ValueError(f"Mapped {len(sources)} encoded features to source columns, expected {n_features}")
+            bundle.derived['source_features'] = sources
+        return sources
+
 shap_service = ShapExplainer()
+CACHES.track("explanation", shap_service.cache)
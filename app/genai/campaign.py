@@ -0,0 +1,222 @@
+"""
+Bulk retention campaigns for a scored customer file.
+
+Reads the output of `python -m app.ml.score ... --top-k K`, keeps the at-risk customers, groups
+them into cohorts by strategy tier and dominant churn drivers, generates one strategy per cohort
+through the retention engine and writes one personalized row per customer. The input is streamed
+twice (cohort statistics, then fan-out), so memory is bounded by the number of cohorts.
+
+    python -m app.ml.score customers.csv scores.csv --top-k 3
+    python -m app.genai.campaign scores.csv campaign.csv --drivers 2
+"""
+import argparse
+import asyncio
+import collections
+import json
+import re
+import time
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.core.logger import logger
+from app.genai.retention_engine import retention_engine, STRATEGY_SOURCES, STRATEGY_TIERS
+from app.ml.score import iter_chunks, ChunkWriter
+
+EMAIL_TEMPLATE = "Dear customer {customerID},\n\n{email_draft}"
+# Drafts are requested without a salutation; one the LLM adds anyway is dropped so rows are not addressed twice
+_GREETING = re.compile(r"^\s*(dear|hi|hello)\b[^,\n]*,\s*", re.IGNORECASE)
+
+def email_body(draft: str) -> str:
+    body = _GREETING.sub("", draft or "", count=1)
+    return body[:1].upper() + body[1:] if body != (draft or "") else body
+
+def _driver_columns(columns) -> list:
+    ranks = [int(m.group(1)) for m in (re.fullmatch(r"driver_(\d+)", c) for c in columns) if m]
+    return [f"driver_{rank}" for rank in sorted(ranks)]
+
+def cohort_frame(chunk: pd.DataFrame, n_drivers: int, min_probability: float = None) -> pd.DataFrame:
+    """
+    At-risk rows of a scored chunk with their cohort columns: `tier` plus `cohort_driver_1..n`,
+    the first `n_drivers` drivers that push churn risk up, sorted so their order does not matter.
+    Customers are at risk if churn_prediction is 1, or their probability is at least `min_probability`.
+    """
+    if min_probability is None:
+        chunk = chunk[chunk['churn_prediction'] == 1]
+    else:
+        chunk = chunk[chunk['churn_probability'] >= min_probability]
+    chunk = chunk.reset_index(drop=True)
+
+    out = pd.DataFrame({
+        'customerID': chunk['customerID'].astype(str) if 'customerID' in chunk.columns else chunk.index.astype(str),
+        'churn_probability': chunk['churn_probability'].to_numpy(np.float64)
+    })
+    out['tier'] = pd.cut(out['churn_probability'], [-np.inf] + [bound for bound, _ in STRATEGY_TIERS],
+                         labels=[name for _, name in STRATEGY_TIERS], right=False).astype(str)
+
+    driver_cols = _driver_columns(chunk.columns)
+    if n_drivers <= 0 or not driver_cols:
+        for i in range(n_drivers):
+            out[f'cohort_driver_{i + 1}'] = ""
+        return out
+
+    names = chunk[driver_cols].astype(str).to_numpy(dtype=object)
+    positive = chunk[[f"{c}_shap" for c in driver_cols]].to_numpy(np.float64) > 0
+    # Keep the first n positive drivers in rank order, blank out the rest
+    keep = positive & (np.cumsum(positive, axis=1) <= n_drivers)
+    selected = np.where(keep, names, "")
+    # Push the kept names to the front, then sort them within the first n columns
+    order = np.argsort(~keep, axis=1, kind="stable")
+    selected = np.take_along_axis(selected, order, axis=1)[:, :n_drivers]
+    selected = np.sort(selected, axis=1)
+    for i in range(selected.shape[1]):
+        out[f'cohort_driver_{i + 1}'] = selected[:, i]
+    for i in range(selected.shape[1], n_drivers):
+        out[f'cohort_driver_{i + 1}'] = ""
+    return out
+
+class CampaignBuilder:
+    """
+    Two passes over a scored file: `collect` builds cohort statistics, `generate` asks the
+    retention engine for one strategy per cohort, `write` fans the strategies out per customer.
+    """
+
+    def __init__(self, engine=retention_engine, n_drivers: int = 2, min_probability: float = None,
+                 chunk_size: int = None):
+        self.engine = engine
+        self.n_drivers = n_drivers
+        self.min_probability = min_probability
+        self.chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
+        self.key_columns = ['tier'] + [f'cohort_driver_{i + 1}' for i in range(n_drivers)]
+        self.cohorts = None
+        self.rows = 0
+
+    def _iter_cohort_frames(self, path: str):
+        for chunk in iter_chunks(path, self.chunk_size):
+            yield len(chunk), cohort_frame(chunk, self.n_drivers, self.min_probability)
+
+    def collect(self, path: str) -> pd.DataFrame:
+        parts = []
+        self.rows = 0
+        for n_rows, frame in self._iter_cohort_frames(path):
+            self.rows += n_rows
+            parts.append(frame.groupby(self.key_columns, sort=False)['churn_probability'].agg(['size', 'sum']))
+        if parts:
+            cohorts = pd.concat(parts).groupby(level=list(range(len(self.key_columns)))).sum()
+        else:
+            cohorts = pd.DataFrame(columns=['size', 'sum'])
+        cohorts = cohorts.reset_index()
+        cohorts['mean_probability'] = cohorts['sum'] / cohorts['size']
+        cohorts['cohort_id'] = np.arange(len(cohorts))
+        self.cohorts = cohorts.drop(columns=['sum'])
+        return self.cohorts
+
+    def _risk_factors(self, row) -> list:
+        return [row[c] for c in self.key_columns[1:] if row[c]]
+
+    async def generate(self) -> list:
+        """
+        One `(strategy, source)` per cohort, requested concurrently (the engine bounds in-flight
+        LLM calls and shares cached or in-flight generations between cohorts with the same cache key).
+        """
+        rows = self.cohorts.to_dict('records')
+        strategies = await asyncio.gather(*(
+            self.engine.agenerate_strategy_with_source(row['mean_probability'], self._risk_factors(row)) for row in rows
+        ))
+        return strategies
+
+    async def _generate_and_close(self) -> list:
+        # The engine's pooled connections belong to this asyncio.run loop; close them before it ends
+        try:
+            return await self.generate()
+        finally:
+            await self.engine.aclose()
+
+    def _join_drivers(self, frame: pd.DataFrame) -> np.ndarray:
+        joined = np.full(len(frame), "", dtype=object)
+        for col in self.key_columns[1:]:
+            names = frame[col].to_numpy(dtype=object)
+            joined = np.where(names == "", joined, np.where(joined == "", names, joined + ", " + names))
+        return joined
+
+    def write(self, path: str, output_path: str, strategies: list) -> int:
+        strategy_table = self.cohorts[self.key_columns + ['cohort_id']].copy()
+        strategy_table['strategy'] = [s.strategy for s, _ in strategies]
+        strategy_table['action_items'] = ["; ".join(s.action_items) for s, _ in strategies]
+        strategy_table['email_template'] = [email_body(s.email_draft) for s, _ in strategies]
+        strategy_table['strategy_source'] = [source for _, source in strategies]
+
+        writer = ChunkWriter(output_path)
+        n_written = 0
+        try:
+            for _, frame in self._iter_cohort_frames(path):
+                if frame.empty:
+                    continue
+                out = frame.merge(strategy_table, on=self.key_columns, how='left')
+                out['risk_factors'] = self._join_drivers(out)
+                out['email_draft'] = [
+                    EMAIL_TEMPLATE.format(customerID=cid, email_draft=draft)
+                    for cid, draft in zip(out['customerID'], out['email_template'])
+                ]
+                writer.write(out[['customerID', 'churn_probability', 'tier', 'cohort_id', 'risk_factors',
+                                  'strategy', 'strategy_source', 'action_items', 'email_draft']])
+                n_written += len(out)
+        finally:
+            writer.close()
+        return n_written
+
+def build_campaign(scores_path: str, output_path: str, n_drivers: int = 2, min_probability: float = None,
+                   chunk_size: int = None, engine=retention_engine) -> dict:
+    """
+    Runs the whole pipeline and returns throughput and deduplication statistics.
+    """
+    builder = CampaignBuilder(engine, n_drivers, min_probability, chunk_size)
+    t0 = time.perf_counter()
+    cohorts = builder.collect(scores_path)
+    collect_s = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    strategies = asyncio.run(builder._generate_and_close()) if len(cohorts) else []
+    generate_s = time.perf_counter() - t1
+
+    t2 = time.perf_counter()
+    at_risk = builder.write(scores_path, output_path, strategies) if len(cohorts) else 0
+    write_s = time.perf_counter() - t2
+    elapsed = time.perf_counter() - t0
+    sources = collections.Counter(source for _, source in strategies)
+
+    stats = {
+        "rows": builder.rows,
+        "at_risk": at_risk,
+        "cohorts": len(cohorts),
+        "dedup_ratio": at_risk / len(cohorts) if len(cohorts) else 0.0,
+        "cohorts_by_source": {source: sources[source] for source in STRATEGY_SOURCES if sources[source]},
+        "cohorts_by_tier": {tier: int(n) for tier, n in cohorts.groupby('tier').size().items()} if len(cohorts) else {},
+        "seconds": {"collect": round(collect_s, 3), "generate": round(generate_s, 3), "write": round(write_s, 3), "total": round(elapsed, 3)},
+        "rows_per_s": builder.rows / elapsed if elapsed else 0.0,
+        "retention": engine.stats()
+    }
+    logger.info(
+        f"Campaign for {at_risk} at-risk customers ({builder.rows} scored) written to {output_path}: "
+        f"{len(cohorts)} cohort strategies ({stats['dedup_ratio']:.1f} customers per strategy) in {elapsed:.2f}s"
+    )
+    if sources["fallback"]:
+        logger.warning(
+            f"{sources['fallback']} of {len(cohorts)} cohorts got the rule-based fallback strategy "
+            f"(LLM timeout or error); see strategy_source in {output_path}"
+        )
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a retention campaign for a scored customer file.")
+    parser.add_argument("scores", help="Output of app.ml.score (CSV or Parquet), ideally with --top-k drivers")
+    parser.add_argument("output", help="Campaign CSV or Parquet file, one row per at-risk customer")
+    parser.add_argument("--drivers", type=int, default=2, help="Dominant drivers per cohort (0 = cohorts by tier only)")
+    parser.add_argument("--min-probability", type=float, help="At-risk cutoff (default: the scored churn_prediction)")
+    parser.add_argument("--chunk-size", type=int, default=settings.BATCH_CHUNK_SIZE, help="Rows per chunk")
+    args = parser.parse_args()
+
+    stats = build_campaign(args.scores, args.output, args.drivers, args.min_probability, args.chunk_size)
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
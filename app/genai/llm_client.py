@@ -0,0 +1,170 @@
+import asyncio
+import json
+import httpx
+from app.core.config import settings
+from app.core.logger import logger
+
+LLM_PROVIDERS = ("mock", "openai", "gemini", "stub")
+
+DEFAULT_MODELS = {
+    "openai": "gpt-4o-mini",
+    "gemini": "gemini-1.5-flash",
+    "stub": "stub"
+}
+DEFAULT_BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "gemini": "https://generativelanguage.googleapis.com/v1beta",
+    # app.genai.stub_server speaks the OpenAI chat completions protocol
+    "stub": "http://127.0.0.1:8100/v1"
+}
+
+class LLMProvider:
+    """
+    One remote API: turns a prompt into an HTTP request and the response into text.
+    """
+    name = None
+
+    def __init__(self, model: str = None, base_url: str = None, api_key: str = None):
+        self.model = model or DEFAULT_MODELS[self.name]
+        self.base_url = (base_url or DEFAULT_BASE_URLS[self.name]).rstrip("/")
+        self.api_key = api_key
+
+    async def complete(self, client: httpx.AsyncClient, system: str, prompt: str) -> str:
+        raise NotImplementedError
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    async def complete(self, client: httpx.AsyncClient, system: str, prompt: str) -> str:
+        response = await client.post(
+            f"{self.base_url}/chat/completions",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={
+                "model": self.model,
+                "messages": [{"role": "system", "content": system}, {"role": "user", "content": prompt}],
+                "response_format": {"type": "json_object"},
+                "temperature": 0.2
+            }
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+class StubProvider(OpenAIProvider):
+    name = "stub"
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    async def complete(self, client: httpx.AsyncClient, system: str, prompt: str) -> str:
+        response = await client.post(
+            f"{self.base_url}/models/{self.model}:generateContent",
+            headers={"x-goog-api-key": self.api_key or ""},
+            json={
+                "systemInstruction": {"parts": [{"text": system}]},
+                "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                "generationConfig": {"responseMimeType": "application/json", "temperature": 0.2}
+            }
+        )
+        response.raise_for_status()
+        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+PROVIDER_CLASSES = {cls.name: cls for cls in (OpenAIProvider, GeminiProvider, StubProvider)}
+
+def build_provider(name: str = None):
+    """
+    Provider for LLM_PROVIDER, or None for "mock" or when the provider's API key is missing
+    (or still the .env.example placeholder).
+    """
+    name = name or settings.LLM_PROVIDER
+    if name not in LLM_PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER {name!r}, expected one of {LLM_PROVIDERS}")
+    if name == "mock":
+        return None
+    api_key = {"openai": settings.OPENAI_API_KEY, "gemini": settings.GEMINI_API_KEY}.get(name, "stub")
+    if not api_key or api_key.startswith("your_"):
+        logger.warning(f"LLM_PROVIDER={name} but no API key is configured; using the rule-based strategies.")
+        return None
+    return PROVIDER_CLASSES[name](model=settings.LLM_MODEL, base_url=settings.LLM_BASE_URL, api_key=api_key)
+
+class AsyncLLMClient:
+    """
+    Shared async client for one provider: a pooled httpx.AsyncClient (keep-alive connections
+    are reused across requests), a semaphore capping in-flight calls at `max_concurrency`,
+    and a per-call timeout on the round trip (time spent queueing for the semaphore is not
+    counted, so a burst of calls does not time out while waiting its turn).
+
+    The pool and semaphore belong to the event loop that first uses them. Whoever owns that
+    loop calls `aclose()` before it ends (app shutdown, the campaign CLI, the sync wrapper
+    of RetentionEngine). If a client is still open when another loop uses this object, it is
+    closed on its own loop if that loop is still running, and a new one is built.
+    """
+
+    def __init__(self, provider: LLMProvider, max_concurrency: int = None, timeout_s: float = None, pool_size: int = None):
+        self.provider = provider
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.timeout_s = timeout_s or settings.LLM_TIMEOUT_S
+        self.pool_size = pool_size or settings.LLM_POOL_SIZE
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    def _ensure_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            self._discard_client()
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout_s)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def generate_json(self, system: str, prompt: str) -> dict:
+        """
+        Sends one prompt and parses the reply as a JSON object. Raises on timeout, HTTP
+        errors and malformed replies; callers decide on the fallback.
+        """
+        self.calls += 1
+        client = self._ensure_client()
+        try:
+            async with self._semaphore:
+                text = await asyncio.wait_for(self.provider.complete(client, system, prompt), timeout=self.timeout_s)
+            return json.loads(text)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+
+    def _discard_client(self):
+        client, old_loop = self._client, self._loop
+        self._client = self._semaphore = self._loop = None
+        if old_loop is not None and old_loop.is_running() and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), old_loop)
+        else:
+            # Its loop is gone, so the pooled connections can no longer be closed cleanly
+            logger.warning("LLM client was not closed before its event loop ended; call aclose() when done")
+
+    async def aclose(self):
+        """
+        Closes the pooled connections. Must run on the loop that opened them.
+        """
+        if self._client is not None:
+            client = self._client
+            self._client = self._semaphore = self._loop = None
+            await client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider.name,
+            "model": self.provider.model,
+            "max_concurrency": self.max_concurrency,
+            "timeout_s": self.timeout_s,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts
+        }
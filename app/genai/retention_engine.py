@@ -1,45 +1,153 @@
-import os
-import json
+import asyncio
+from app.core.cache import build_cache
+from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import CACHES, LLM_REQUESTS_TOTAL
 from app.api.schemas import RetentionStrategy
+from app.genai.llm_client import AsyncLLMClient, build_provider
 from typing import List
 
-# Mock OpenAI client if not installed or key invalid, but user asked for "OpenAI / Gemini API (abstracted)"
-# We will assume OpenAI client usage structure but wrap it to be safe.
+SYSTEM_PROMPT = (
+    "You are a retention specialist at a telecom company. Reply with a JSON object with the keys "
+    "\"strategy\" (a short title), \"action_items\" (2 to 4 concrete offers or actions) and "
+    "\"email_draft\" (the body of a short, friendly email to the customer, without a greeting "
+    "(it is added per customer) or sign-off)."
+)
+
+# Upper probability bounds of the strategy tiers used by the rule-based strategies and campaign cohorts
+STRATEGY_TIERS = ((0.3, "low"), (0.7, "medium"), (float("inf"), "high"))
+
+# Where a strategy came from: the LLM, the strategy cache, the rule-based fallback after an LLM
+# timeout or error, or the rule-based strategies of mock mode
+STRATEGY_SOURCES = ("generated", "cached", "fallback", "rule_based")
+
+def strategy_tier(churn_prob: float) -> str:
+    return next(name for bound, name in STRATEGY_TIERS if churn_prob < bound)
+
+def strategy_cache_key(churn_prob: float, risk_factors: List[str]) -> str:
+    """
+    Customers in the same probability bucket (LLM_CACHE_BUCKET wide) with the same set of
+    risk factors share one generated strategy.
+    """
+    n_buckets = max(1, round(1 / settings.LLM_CACHE_BUCKET))
+    bucket = min(int(churn_prob / settings.LLM_CACHE_BUCKET), n_buckets - 1)
+    return f"{bucket}:{'|'.join(sorted(set(risk_factors)))}"
 
 class RetentionEngine:
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        self.mock_mode = not self.api_key or "your_openai_api_key" in self.api_key
+    def __init__(self, llm_client: AsyncLLMClient = None, cache=None):
+        if llm_client is None:
+            provider = build_provider()
+            llm_client = AsyncLLMClient(provider) if provider else None
+        self.llm_client = llm_client
+        # Rule-based strategies when no provider is configured (LLM_PROVIDER=mock or no API key)
+        self.mock_mode = llm_client is None
+        # Generated strategies keyed by strategy_cache_key (None = no caching)
+        self.cache = cache if cache is not None else build_cache(
+            settings.LLM_CACHE_BACKEND, settings.LLM_CACHE_SIZE,
+            ttl_s=settings.LLM_CACHE_TTL_S, url=settings.LLM_CACHE_REDIS_URL, prefix="churn:retention:"
+        )
+        # Generations in progress, so concurrent requests for one key share a single LLM call
+        self._inflight = {}
+        self.fallbacks = 0
 
     def generate_strategy(self, churn_prob: float, risk_factors: List[str]) -> RetentionStrategy:
         """
         Generates personalized retention strategies using GenAI.
+        Synchronous wrapper for callers outside an event loop; the API awaits agenerate_strategy.
         """
         if self.mock_mode:
             logger.info("Running Retention Engine in Mock Mode (No API Key).")
             return self._mock_strategy(churn_prob, risk_factors)
-        
+        return asyncio.run(self._generate_once(churn_prob, risk_factors))
+
+    async def _generate_once(self, churn_prob: float, risk_factors: List[str]) -> RetentionStrategy:
+        # Each asyncio.run gets its own loop, so its connections are closed before the loop ends
         try:
-            # TODO: Integrate with real OpenAI API
-            # For now, we use a rule-based mock engine for reliability.
-            return self._mock_strategy(churn_prob, risk_factors)
-            
+            return await self.agenerate_strategy(churn_prob, risk_factors)
+        finally:
+            await self.aclose()
+
+    async def agenerate_strategy(self, churn_prob: float, risk_factors: List[str]) -> RetentionStrategy:
+        """
+        Cached strategy for the customer's bucket and risk factors, generated by the LLM on a miss.
+        Timeouts and provider errors fall back to the rule-based strategy (which is not cached).
+        """
+        strategy, _ = await self.agenerate_strategy_with_source(churn_prob, risk_factors)
+        return strategy
+
+    async def agenerate_strategy_with_source(self, churn_prob: float, risk_factors: List[str]) -> tuple:
+        """
+        Like agenerate_strategy, but returns `(strategy, source)` with source one of STRATEGY_SOURCES.
+        """
+        if self.mock_mode:
+            return self.generate_strategy(churn_prob, risk_factors), "rule_based"
+
+        key = strategy_cache_key(churn_prob, risk_factors)
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            LLM_REQUESTS_TOTAL.labels(self.llm_client.provider.name, "cache_hit").inc()
+            return RetentionStrategy(**cached), "cached"
+
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._generate(key, churn_prob, risk_factors))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: a cancelled request must not cancel the generation other requests are awaiting
+        return await asyncio.shield(pending)
+
+    async def _generate(self, key: str, churn_prob: float, risk_factors: List[str]) -> tuple:
+        provider = self.llm_client.provider.name
+        # The prompt only uses what the cache key captures, so a cached reply fits every customer sharing it
+        bucket = int(key.split(":", 1)[0])
+        prompt = (
+            f"Churn probability: {bucket * settings.LLM_CACHE_BUCKET:.0%} to {(bucket + 1) * settings.LLM_CACHE_BUCKET:.0%}.\n"
+            f"Top churn drivers: {', '.join(sorted(set(risk_factors))) or 'none identified'}.\n"
+            "Propose a retention strategy for this customer."
+        )
+        try:
+            strategy = RetentionStrategy(**await self.llm_client.generate_json(SYSTEM_PROMPT, prompt))
+        except asyncio.TimeoutError:
+            logger.warning(f"GenAI generation timed out after {self.llm_client.timeout_s}s, using rule-based strategy")
+            LLM_REQUESTS_TOTAL.labels(provider, "timeout").inc()
+            self.fallbacks += 1
+            return self._mock_strategy(churn_prob, risk_factors), "fallback"
         except Exception as e:
             logger.error(f"GenAI generation failed: {e}")
-            return self._fallback_strategy()
+            LLM_REQUESTS_TOTAL.labels(provider, "error").inc()
+            self.fallbacks += 1
+            return self._mock_strategy(churn_prob, risk_factors), "fallback"
+
+        LLM_REQUESTS_TOTAL.labels(provider, "ok").inc()
+        if self.cache is not None:
+            self.cache.set(key, strategy.dict())
+        return strategy, "generated"
+
+    async def aclose(self):
+        if self.llm_client is not None:
+            await self.llm_client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "mode": "mock" if self.mock_mode else "llm",
+            "llm": self.llm_client.stats() if self.llm_client else None,
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "inflight": len(self._inflight),
+            "fallbacks": self.fallbacks
+        }
 
     def _mock_strategy(self, churn_prob, risk_factors):
         """
         Deterministic mock response based on rules, to simulate AI.
         """
-        if churn_prob < 0.3:
+        tier = strategy_tier(churn_prob)
+        if tier == "low":
             return RetentionStrategy(
                 strategy="Loyalty Appreciation",
                 action_items=["Send 'Thank You' email", "Offer 5% discount on next bill"],
-                email_draft="Dear Valued Customer, thanks for being with us!"
+                email_draft="Thanks for being with us!"
             )
-        elif churn_prob < 0.7:
+        elif tier == "medium":
              return RetentionStrategy(
                 strategy="Proactive Engagement",
                 action_items=["Offer free upgrade to next tier for 1 month", "Check in call from support"],
@@ -60,3 +168,4 @@ class RetentionEngine:
         )
 
 retention_engine = RetentionEngine()
+CACHES.track("retention", retention_engine.cache)
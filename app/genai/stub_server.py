@@ -0,0 +1,46 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions API, for tests and load runs of the
+LLM path without network access or API keys:
+
+    LLM_STUB_DELAY_MS=300 uvicorn app.genai.stub_server:app --port 8100
+    LLM_PROVIDER=stub uvicorn app.main:app
+
+Replies are deterministic JSON retention strategies built from the prompt's churn drivers,
+after LLM_STUB_DELAY_MS of simulated generation time.
+"""
+import asyncio
+import json
+from fastapi import FastAPI
+from app.core.config import settings
+
+app = FastAPI(title="Stub LLM")
+stats = {"requests": 0}
+
+def _drivers(prompt: str) -> list:
+    for line in prompt.splitlines():
+        if line.startswith("Top churn drivers:"):
+            drivers = line.split(":", 1)[1].strip().rstrip(".")
+            return [] if drivers == "none identified" else drivers.split(", ")
+    return []
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    stats["requests"] += 1
+    await asyncio.sleep(settings.LLM_STUB_DELAY_MS / 1000)
+    prompt = body["messages"][-1]["content"]
+    drivers = _drivers(prompt)
+    content = {
+        "strategy": "Targeted Retention Offer",
+        "action_items": [f"Address {driver}" for driver in drivers] or ["Check in call from support"],
+        "email_draft": "We value you as a customer and would like to offer you a better plan."
+    }
+    return {
+        "id": f"stub-{stats['requests']}",
+        "object": "chat.completion",
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps(content)}, "finish_reason": "stop"}]
+    }
+
+@app.get("/stats")
+def get_stats():
+    return stats
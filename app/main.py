@@ -1,7 +1,17 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api.routes import router as api_router
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.executor import inference_executor
+from app.core.metrics import CONTENT_TYPE, REQUESTS_TOTAL, REQUEST_SECONDS, render
+from app.ml.registry import model_registry
+from app.ml.warmup import model_warmup
+from app.genai.retention_engine import retention_engine
+from app.explainability.global_explainer import global_explainer
+
+API_PREFIX = "/api/v1"
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -9,12 +19,65 @@ app = FastAPI(
     description="Enterprise Customer Churn Prediction API"
 )
 
-app.include_router(api_router, prefix="/api/v1")
+app.include_router(api_router, prefix=API_PREFIX)
+
+# The route in the request scope is the router's own, so its path lacks the mount prefix
+_api_route_ids = {id(route) for route in api_router.routes}
+
+def _route_template(request: Request) -> str:
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    return API_PREFIX + route.path if id(route) in _api_route_ids else route.path
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Labelled by route template (e.g. /api/v1/predict), not the raw path, to bound cardinality
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        endpoint = _route_template(request)
+        REQUEST_SECONDS.labels(request.method, endpoint).observe(time.perf_counter() - t0)
+        REQUESTS_TOTAL.labels(request.method, endpoint, str(status)).inc()
+
+@app.on_event("startup")
+def warmup_models():
+    # Load the model and SHAP explainer in the background by default (STARTUP_WARMUP)
+    model_warmup.start()
+    model_registry.start_watcher(settings.MODEL_WATCH_INTERVAL_S)
+    if settings.GLOBAL_EXPLAIN_ON_STARTUP:
+        global_explainer.start()
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    model_registry.stop_watcher()
+    inference_executor.shutdown()
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    # Closes pooled LLM connections on the loop that opened them
+    await retention_engine.aclose()
 
 @app.get("/health")
 def health_check():
+    # Liveness: answers as soon as the process serves HTTP, even while models warm up
     return {"status": "healthy"}
 
+@app.get("/ready")
+def readiness_check():
+    # Readiness: 200 once the model and explainer are loaded, 503 until then
+    status = model_warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus text exposition format: request, stage and model load/warmup metrics
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
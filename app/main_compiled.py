@@ -0,0 +1,148 @@
+"""
+Lightweight serving mode: scores with the compiled NumPy artifact written at training time
+(see app/ml/compiled.py) and never loads the pickled pipeline, so pandas, sklearn, xgboost
+and shap are not imported. Workers boot faster and use less memory; explanations, analysis
+and retention strategies are only served by the full app (app/main.py).
+
+    uvicorn app.main_compiled:app --host 0.0.0.0 --port 8000
+"""
+import threading
+import time
+from fastapi import FastAPI, APIRouter, HTTPException
+from app.api.schemas import CustomerInput, PredictionOutput, BatchPredictionInput, BatchPredictionOutput
+from app.core.config import settings
+from app.core.logger import logger
+from app.ml.metadata import load_metadata
+from app.ml.registry import model_registry, ModelBundle
+
+class CompiledPredictor:
+    """
+    Holds the active compiled model and its decision threshold.
+    """
+
+    def __init__(self, registry=model_registry):
+        self.registry = registry
+        self._model = None
+        self._threshold = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        model, threshold = self._model, self._threshold
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    self._swap(self.registry.load_compiled())
+                model, threshold = self._model, self._threshold
+        return model, threshold
+
+    def _swap(self, model):
+        threshold = ModelBundle._resolve_threshold(load_metadata(model.path))
+        self._model, self._threshold = model, threshold
+
+    def reload(self):
+        """
+        Loads the version named by the registry's ACTIVE pointer if it differs from the served one.
+        """
+        version = self.registry.read_active_version()
+        if self._model is None or self._model.version != version:
+            model = self.registry.load_compiled(version)
+            with self._lock:
+                self._swap(model)
+        return self._model
+
+    def predict_records(self, records):
+        model, threshold = self._get()
+        probabilities = model.predict_records(records)
+        return [
+            {"churn_prediction": int(p > threshold), "churn_probability": p}
+            for p in probabilities.tolist()
+        ]
+
+    def stats(self) -> dict:
+        if self._model is None:
+            return {"loaded": False, "active_version": self.registry.read_active_version()}
+        return {
+            "loaded": True,
+            "version": self._model.version,
+            "path": self._model.path,
+            "n_trees": self._model.n_trees,
+            "decision_threshold": self._threshold
+        }
+
+compiled_predictor = CompiledPredictor()
+
+router = APIRouter()
+
+@router.post("/predict", response_model=PredictionOutput)
+def predict_churn(customer: CustomerInput):
+    """
+    Predicts customer churn probability.
+    """
+    try:
+        result = compiled_predictor.predict_records([customer.dict()])[0]
+        result['risk_factors'] = []
+        return result
+    except Exception as e:
+        logger.error(f"Prediction endpoint error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/batch", response_model=BatchPredictionOutput)
+def predict_churn_batch(batch: BatchPredictionInput):
+    """
+    Scores many customers in one vectorized pass. Results keep the input order.
+    """
+    if not batch.customers:
+        raise HTTPException(status_code=400, detail="No customers provided.")
+    try:
+        t0 = time.perf_counter()
+        records = [customer.dict(exclude={'customerID'}) for customer in batch.customers]
+        results = compiled_predictor.predict_records(records)
+        latency_ms = (time.perf_counter() - t0) * 1000
+        return {
+            "predictions": [
+                {"customerID": customer.customerID, **result}
+                for customer, result in zip(batch.customers, results)
+            ],
+            "n_customers": len(results),
+            "n_chunks": 1,
+            "latency_ms": latency_ms,
+            "chunk_latency_ms": [latency_ms]
+        }
+    except Exception as e:
+        logger.error(f"Batch prediction endpoint error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats")
+def serving_stats():
+    return {"mode": "compiled", "model": compiled_predictor.stats()}
+
+@router.post("/admin/models/reload")
+def reload_model():
+    try:
+        compiled_predictor.reload()
+        return compiled_predictor.stats()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Compiled model reload error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    version=settings.VERSION,
+    description="Customer Churn Prediction API (compiled scorer)"
+)
+
+app.include_router(router, prefix="/api/v1")
+
+@app.on_event("startup")
+def load_model():
+    compiled_predictor.reload()
+
+@app.get("/health")
+def health_check():
+    return {"status": "healthy"}
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
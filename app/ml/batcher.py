@@ -0,0 +1,99 @@
+import asyncio
+from app.core.config import settings
+from app.core.executor import inference_executor
+from app.core.logger import logger
+from app.core.metrics import MICROBATCH_SIZE
+from app.ml.predict import predictor
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-record predictions into one matrix.
+
+    Requests are collected until `max_batch_size` rows are waiting or the first
+    request has waited `max_wait_ms`, then the batch is scored on the inference pool
+    in a single classifier call and each awaiting handler gets its own row back.
+    """
+
+    def __init__(self, predictor, max_batch_size: int, max_wait_ms: float, histogram=MICROBATCH_SIZE):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        # Batch sizes go to churn_microbatch_size on /metrics; stats() reads them back
+        self._histogram = histogram.labels()
+        self._loop = None
+        self._queue = None
+        self._task = None
+
+    async def submit(self, record: dict, timeout: float = None) -> dict:
+        """
+        Queues one record for the next batch and waits for its result.
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((record, future))
+        return await asyncio.wait_for(future, timeout or inference_executor.timeout_s)
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._collect())
+            logger.info(
+                f"Micro-batcher started (max batch {self.max_batch_size}, max wait {self.max_wait_s * 1000:.1f} ms)"
+            )
+
+    async def _collect(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Score in the background so the next batch can fill while this one runs
+            self._loop.create_task(self._score(batch))
+
+    async def _score(self, batch):
+        # Callers that already timed out do not need a row
+        batch = [(record, future) for record, future in batch if not future.done()]
+        if not batch:
+            return
+        self._histogram.observe(len(batch))
+
+        try:
+            results = await inference_executor.run(self.predictor.predict_records, [record for record, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        """
+        Batch count, request count and the cumulative batch-size histogram (Prometheus `le` style).
+        """
+        histogram, requests, batches = self._histogram.snapshot()
+        return {
+            "enabled": settings.MICROBATCH_ENABLED,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000,
+            "batches": batches,
+            "requests": int(requests),
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "batch_size_histogram": histogram
+        }
+
+micro_batcher = MicroBatcher(
+    predictor,
+    max_batch_size=settings.MICROBATCH_MAX_BATCH_SIZE,
+    max_wait_ms=settings.MICROBATCH_MAX_WAIT_MS
+)
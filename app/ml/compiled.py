@@ -0,0 +1,201 @@
+"""
+NumPy-only compiled form of the churn pipeline.
+
+`compile_pipeline` flattens a fitted pipeline (StandardScaler + OneHotEncoder + XGBoost
+binary:logistic tree ensemble) into plain arrays saved as a .npz next to the model
+artifact. `CompiledModel` loads that file and scores records with a vectorized traversal
+of all trees at once. Loading and scoring never import pandas, sklearn or xgboost.
+"""
+import json
+import os
+import numpy as np
+from app.core.logger import logger
+from app.ml.encoder import FeatureEncoder
+
+COMPILED_FORMAT_VERSION = 1
+# Rows scored per traversal pass; bounds the (rows x trees) node-index matrix
+SCORE_CHUNK_ROWS = 4096
+
+def compiled_path(model_path: str) -> str:
+    """
+    Path of the compiled artifact next to a model artifact (models/churn_model.pkl -> models/churn_model.npz).
+    """
+    return os.path.splitext(model_path)[0] + ".npz"
+
+def _compile_trees(booster) -> dict:
+    """
+    Concatenates every tree of `booster` into global node arrays. Leaves point to themselves,
+    so a fixed number of traversal steps (the ensemble depth) lands every row on its leaf.
+    """
+    model = json.loads(booster.save_raw("json"))["learner"]
+    if model["objective"]["name"] != "binary:logistic":
+        raise ValueError(f"Unsupported objective: {model['objective']['name']}")
+    if model["gradient_booster"]["name"] != "gbtree":
+        raise ValueError(f"Unsupported booster: {model['gradient_booster']['name']}")
+
+    trees = model["gradient_booster"]["model"]["trees"]
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    max_depth = 0
+    for tree in trees:
+        if any(tree["split_type"]):
+            raise ValueError("Categorical splits are not supported")
+        offset = len(feature)
+        roots.append(offset)
+        lc = np.asarray(tree["left_children"], dtype=np.int64)
+        rc = np.asarray(tree["right_children"], dtype=np.int64)
+        is_leaf = lc == -1
+        own = np.arange(len(lc)) + offset
+        feature.extend(np.where(is_leaf, 0, tree["split_indices"]))
+        threshold.extend(tree["split_conditions"])
+        left.extend(np.where(is_leaf, own, lc + offset))
+        right.extend(np.where(is_leaf, own, rc + offset))
+        default_left.extend(tree["default_left"])
+        # For leaves, split_conditions holds the leaf weight
+        value.extend(np.where(is_leaf, tree["split_conditions"], 0.0))
+
+        depth = np.zeros(len(lc), dtype=np.int64)
+        for node in range(len(lc)):
+            if not is_leaf[node]:
+                depth[lc[node]] = depth[rc[node]] = depth[node] + 1
+        max_depth = max(max_depth, int(depth.max()))
+
+    base_score = float(str(model["learner_model_param"]["base_score"]).strip("[]"))
+    return {
+        "feature": np.asarray(feature, dtype=np.int32),
+        "threshold": np.asarray(threshold, dtype=np.float32),
+        "left": np.asarray(left, dtype=np.int32),
+        "right": np.asarray(right, dtype=np.int32),
+        "default_left": np.asarray(default_left, dtype=bool),
+        "value": np.asarray(value, dtype=np.float32),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "base_margin": np.float32(np.log(base_score / (1.0 - base_score))),
+        "max_depth": max_depth
+    }
+
+def compile_pipeline(pipeline) -> dict:
+    """
+    Arrays and JSON-able metadata describing `pipeline`. Raises ValueError for layouts the
+    compiled scorer cannot reproduce (same rules as FeatureEncoder, plus numeric splits only).
+    """
+    encoder = FeatureEncoder.from_preprocessor(pipeline.named_steps['preprocessor'])
+    trees = _compile_trees(pipeline.named_steps['classifier'].get_booster())
+    meta = {
+        "format_version": COMPILED_FORMAT_VERSION,
+        "numerical_cols": encoder.numerical_cols,
+        "categorical_cols": encoder.categorical_cols,
+        # Category values in output-column order per column
+        "categories": [[c.item() if hasattr(c, 'item') else c for c in table] for table in encoder.category_tables],
+        "feature_names": encoder.feature_names,
+        "max_depth": trees.pop("max_depth")
+    }
+    return {**trees, "mean": encoder.mean, "scale": encoder.scale, "meta": np.array(json.dumps(meta))}
+
+class CompiledModel:
+    """
+    Scores raw customer records from a compiled artifact (see `compile_pipeline`).
+    """
+
+    def __init__(self, arrays: dict, path: str = None, version: str = None):
+        meta = json.loads(str(arrays["meta"]))
+        if meta["format_version"] != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format {meta['format_version']}")
+        self.path = path
+        self.version = version
+        self.feature_names = meta["feature_names"]
+        self.max_depth = meta["max_depth"]
+        offset = len(meta["numerical_cols"])
+        category_tables = []
+        for categories in meta["categories"]:
+            category_tables.append({cat: offset + j for j, cat in enumerate(categories)})
+            offset += len(categories)
+        self.encoder = FeatureEncoder(
+            meta["numerical_cols"], arrays["mean"], arrays["scale"], meta["categorical_cols"],
+            category_tables, meta["feature_names"]
+        )
+        self.feature = arrays["feature"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"].astype(np.int64)
+        self.base_margin = np.float32(arrays["base_margin"])
+        # Leaves always "go left" onto themselves: +inf threshold, missing values default left
+        is_leaf = self.left == np.arange(len(self.left))
+        self.threshold = np.where(is_leaf, np.inf, arrays["threshold"]).astype(np.float32)
+        self.default_left = arrays["default_left"] | is_leaf
+
+    @classmethod
+    def load(cls, path: str, version: str = None) -> "CompiledModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files}, path, version)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict_proba_encoded(self, X: np.ndarray) -> np.ndarray:
+        """
+        Churn probability for rows already encoded (same layout as the preprocessor output).
+        """
+        # XGBoost compares float32 feature values against float32 split conditions
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), SCORE_CHUNK_ROWS):
+            out[start:start + SCORE_CHUNK_ROWS] = self._margin(X[start:start + SCORE_CHUNK_ROWS])
+        return 1.0 / (1.0 + np.exp(-out.astype(np.float64)))
+
+    def _margin(self, X: np.ndarray) -> np.ndarray:
+        # One (rows x trees) matrix of current nodes, advanced one level per step
+        n_rows, n_features = X.shape
+        flat = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        for _ in range(self.max_depth):
+            x = flat[row_offsets + self.feature[nodes]]
+            # NaN compares False, so only missing values consult default_left
+            go_left = (x < self.threshold[nodes]) | (np.isnan(x) & self.default_left[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].sum(axis=1, dtype=np.float32) + self.base_margin
+
+    def predict_records(self, records) -> np.ndarray:
+        """
+        Churn probabilities for a list of raw records (dicts with the CustomerInput fields).
+        """
+        return self.predict_proba_encoded(self.encoder.encode_many(records))
+
+def check_parity(pipeline, compiled: CompiledModel, records=None, atol: float = 1e-5) -> bool:
+    """
+    Compares compiled probabilities with `pipeline.predict_proba` on the given (or probe) records.
+    """
+    import pandas as pd
+
+    records = records or compiled.encoder.probe_records()
+    expected = pipeline.predict_proba(pd.DataFrame(records))[:, 1]
+    actual = compiled.predict_records(records)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(records) else 0.0
+    if max_diff > atol:
+        logger.error(f"Compiled model parity check failed: max abs diff {max_diff}")
+        return False
+    return True
+
+def export_compiled(pipeline, model_path: str):
+    """
+    Compiles `pipeline`, checks parity and writes the artifact next to `model_path`.
+    Returns the artifact path, or None if the pipeline cannot be compiled exactly
+    (training still succeeds; only the compiled serving mode is unavailable for it).
+    """
+    path = compiled_path(model_path)
+    try:
+        arrays = compile_pipeline(pipeline)
+        compiled = CompiledModel(arrays, path)
+    except Exception as e:
+        logger.warning(f"Compiled model export skipped: {e}")
+        return None
+    if not check_parity(pipeline, compiled):
+        logger.warning("Compiled model export skipped: parity check failed.")
+        return None
+
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+    logger.info(f"Compiled model ({compiled.n_trees} trees, depth {compiled.max_depth}) exported to {path}")
+    return path
@@ -0,0 +1,147 @@
+import numpy as np
+from app.core.logger import logger
+
+class FeatureEncoder:
+    """
+    Compiled version of the fitted ColumnTransformer (StandardScaler + OneHotEncoder).
+
+    Maps a raw customer record (dict) straight into a NumPy feature row, skipping
+    DataFrame construction and sklearn column dispatch. The output layout is identical
+    to `preprocessor.transform`: scaled numerics first, then one-hot blocks in order.
+    """
+
+    def __init__(self, numerical_cols, mean, scale, categorical_cols, category_tables, feature_names):
+        self.numerical_cols = list(numerical_cols)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.categorical_cols = list(categorical_cols)
+        # One dict per categorical column: category value -> output column index
+        self.category_tables = category_tables
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self._n_num = len(self.numerical_cols)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """
+        Builds an encoder from a fitted ColumnTransformer.
+        Raises ValueError if the transformer layout is not one the encoder can reproduce exactly.
+        """
+        if getattr(preprocessor, 'sparse_output_', False):
+            # XGBoost treats implicit zeros in sparse input as missing, a dense row would not match
+            raise ValueError("Sparse preprocessor output is not supported")
+
+        numerical_cols, mean, scale = [], [], []
+        categorical_cols, category_tables, cat_feature_names = [], [], []
+        offset = None
+
+        for name, estimator, columns in preprocessor.transformers_:
+            if name == 'remainder':
+                if estimator != 'drop':
+                    raise ValueError("Remainder columns are not supported")
+                continue
+            if name == 'num':
+                if categorical_cols:
+                    raise ValueError("Numerical block must precede categorical blocks")
+                n = len(columns)
+                numerical_cols.extend(columns)
+                mean.extend(estimator.mean_ if estimator.with_mean else np.zeros(n))
+                scale.extend(estimator.scale_ if estimator.with_std else np.ones(n))
+            elif name == 'cat':
+                if estimator.drop_idx_ is not None or getattr(estimator, 'infrequent_categories_', None) is not None:
+                    raise ValueError("Dropped or infrequent categories are not supported")
+                if getattr(estimator, 'handle_unknown', 'error') == 'error':
+                    raise ValueError("OneHotEncoder must use handle_unknown='ignore'")
+                offset = len(numerical_cols) if offset is None else offset
+                for col, categories in zip(columns, estimator.categories_):
+                    categorical_cols.append(col)
+                    category_tables.append({cat: offset + j for j, cat in enumerate(categories)})
+                    cat_feature_names.extend(f"{col}_{cat}" for cat in categories)
+                    offset += len(categories)
+            else:
+                raise ValueError(f"Unsupported transformer: {name}")
+
+        return cls(
+            numerical_cols, mean, scale, categorical_cols, category_tables,
+            list(numerical_cols) + cat_feature_names
+        )
+
+    def encode(self, record: dict) -> np.ndarray:
+        """
+        Encodes one record into a (1, n_features) matrix.
+        """
+        X = np.zeros((1, self.n_features), dtype=np.float64)
+        self._encode_into(record, X[0])
+        return X
+
+    def encode_many(self, records) -> np.ndarray:
+        """
+        Encodes a list of records into a preallocated (n, n_features) matrix.
+        """
+        X = np.zeros((len(records), self.n_features), dtype=np.float64)
+        for i, record in enumerate(records):
+            self._encode_into(record, X[i])
+        return X
+
+    def _encode_into(self, record: dict, row: np.ndarray):
+        n_num = self._n_num
+        row[:n_num] = [record[col] for col in self.numerical_cols]
+        row[:n_num] -= self.mean
+        row[:n_num] /= self.scale
+        for col, table in zip(self.categorical_cols, self.category_tables):
+            # Unknown categories leave the block all-zero, like handle_unknown='ignore'
+            idx = table.get(record[col])
+            if idx is not None:
+                row[idx] = 1.0
+
+    def probe_records(self):
+        """
+        Builds a few records that exercise every category (plus an unknown one),
+        used to check parity with the sklearn preprocessor.
+        """
+        n_probes = max([len(table) for table in self.category_tables] + [1])
+        records = []
+        for i in range(n_probes + 1):
+            record = {col: float(mean + (i - 1) * scale) for col, mean, scale in zip(self.numerical_cols, self.mean, self.scale)}
+            for col, table in zip(self.categorical_cols, self.category_tables):
+                categories = list(table)
+                record[col] = categories[i] if i < len(categories) else "__unknown__"
+            records.append(record)
+        return records
+
+    def check_parity(self, preprocessor, records=None, atol: float = 1e-9) -> bool:
+        """
+        Compares the encoder output with `preprocessor.transform` on the given (or probe) records.
+        """
+        import pandas as pd
+
+        records = records or self.probe_records()
+        expected = preprocessor.transform(pd.DataFrame(records))
+        if hasattr(expected, 'toarray'):
+            expected = expected.toarray()
+        actual = self.encode_many(records)
+
+        if expected.shape != actual.shape:
+            logger.error(f"Encoder parity check failed: shape {actual.shape} != {expected.shape}")
+            return False
+        max_diff = float(np.max(np.abs(expected - actual))) if actual.size else 0.0
+        if max_diff > atol:
+            logger.error(f"Encoder parity check failed: max abs diff {max_diff}")
+            return False
+        return True
+
+def build_encoder(preprocessor):
+    """
+    Returns a parity-checked FeatureEncoder for the preprocessor, or None if the
+    fast path cannot reproduce it (callers then fall back to the pandas path).
+    """
+    try:
+        encoder = FeatureEncoder.from_preprocessor(preprocessor)
+    except Exception as e:
+        logger.warning(f"Feature encoder fast path disabled: {e}")
+        return None
+    if not encoder.check_parity(preprocessor):
+        logger.warning("Feature encoder fast path disabled: parity check failed.")
+        return None
+    logger.info(f"Feature encoder compiled ({encoder.n_features} features).")
+    return encoder
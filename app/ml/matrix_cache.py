@@ -0,0 +1,106 @@
+"""
+On-disk cache of encoded training matrices.
+
+Parsing the CSV and fitting/applying the ColumnTransformer dominate short training runs.
+The fitted preprocessor and the encoded train/test splits are stored per dataset
+(keyed by the file's path, size and mtime plus the split parameters), so repeated
+training and evaluation runs on unchanged data start from the encoded matrices.
+"""
+import hashlib
+import json
+import os
+import shutil
+import joblib
+import numpy as np
+import scipy.sparse as sp
+from app.core.logger import logger
+from app.data.loader import SCHEMA_VERSION
+
+# Bump when the encoding or the stored layout changes so stale entries are not reused
+MATRIX_CACHE_VERSION = 1
+
+def dataset_key(path: str, **params) -> str:
+    """
+    Cache key for `path` as it is on disk now, combined with the parameters that shape the matrices.
+    """
+    stat = os.stat(path)
+    key = json.dumps({
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "schema": SCHEMA_VERSION,
+        "layout": MATRIX_CACHE_VERSION,
+        **params
+    }, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+class TrainingMatrices:
+    """
+    Fitted preprocessor plus the encoded train/test splits (CSR) and their labels.
+    """
+
+    def __init__(self, preprocessor, X_train, y_train, X_test, y_test, features: list):
+        self.preprocessor = preprocessor
+        self.X_train = sp.csr_matrix(X_train, dtype=np.float32)
+        self.y_train = np.asarray(y_train)
+        self.X_test = sp.csr_matrix(X_test, dtype=np.float32)
+        self.y_test = np.asarray(y_test)
+        self.features = features
+
+    @staticmethod
+    def dense(X) -> np.ndarray:
+        """
+        Dense float32 copy for XGBoost. CSR input would make XGBoost treat the zeros as
+        missing values, which is not how the served (dense) pipeline presents them.
+        """
+        return X.toarray()
+
+class MatrixCache:
+    """
+    `cache_dir/<key>/` holds preprocessor.pkl, X_{train,test}.npz, y_{train,test}.npy and meta.json.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key: str):
+        """
+        The cached matrices for `key`, or None if there is no (complete) entry.
+        """
+        entry = self._entry_dir(key)
+        if not os.path.exists(os.path.join(entry, "meta.json")):
+            return None
+        try:
+            with open(os.path.join(entry, "meta.json")) as f:
+                meta = json.load(f)
+            return TrainingMatrices(
+                joblib.load(os.path.join(entry, "preprocessor.pkl")),
+                sp.load_npz(os.path.join(entry, "X_train.npz")),
+                np.load(os.path.join(entry, "y_train.npy")),
+                sp.load_npz(os.path.join(entry, "X_test.npz")),
+                np.load(os.path.join(entry, "y_test.npy")),
+                meta["features"]
+            )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable matrix cache entry {entry}: {e}")
+            return None
+
+    def save(self, key: str, matrices: TrainingMatrices):
+        # Write into a temporary directory and rename, so readers never see a partial entry
+        entry = self._entry_dir(key)
+        tmp = f"{entry}.tmp-{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        joblib.dump(matrices.preprocessor, os.path.join(tmp, "preprocessor.pkl"))
+        sp.save_npz(os.path.join(tmp, "X_train.npz"), matrices.X_train)
+        np.save(os.path.join(tmp, "y_train.npy"), matrices.y_train)
+        sp.save_npz(os.path.join(tmp, "X_test.npz"), matrices.X_test)
+        np.save(os.path.join(tmp, "y_test.npy"), matrices.y_test)
+        # meta.json last: its presence marks the entry complete
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"features": matrices.features, "n_train": len(matrices.y_train), "n_test": len(matrices.y_test)}, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        logger.info(f"Cached encoded training matrices in {entry}")
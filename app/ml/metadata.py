@@ -0,0 +1,38 @@
+import json
+import os
+from app.core.logger import logger
+
+DEFAULT_DECISION_THRESHOLD = 0.5
+
+def metadata_path(model_path: str) -> str:
+    """
+    Returns the path of the JSON metadata file stored next to a model artifact
+    (models/churn_model.pkl -> models/churn_model.json).
+    """
+    return os.path.splitext(model_path)[0] + ".json"
+
+def load_metadata(model_path: str) -> dict:
+    """
+    Loads the metadata saved alongside a model artifact. Returns an empty dict if missing.
+    """
+    path = metadata_path(model_path)
+    if not os.path.exists(path):
+        logger.warning(f"No model metadata found at {path}, using defaults.")
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Failed to read model metadata from {path}: {e}")
+        return {}
+
+def save_metadata(model_path: str, metadata: dict):
+    """
+    Writes metadata next to the model artifact.
+    """
+    path = metadata_path(model_path)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp, path)
+    logger.info(f"Model metadata saved to {path}")
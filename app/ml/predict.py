@@ -1,42 +1,210 @@
-import joblib
+import hashlib
+import json
 import pandas as pd
 import logging
+import time
+from app.core.cache import build_cache
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import CACHES, stage_timer
+from app.ml.registry import model_registry
+
+def record_digest(record: dict) -> str:
+    """
+    Canonical hash of a customer's feature values: independent of key order, ignores customerID.
+    """
+    canonical = json.dumps(sorted((k, v) for k, v in record.items() if k != 'customerID'), separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
 
 class ChurnPredictor:
-    def __init__(self):
-        self.model = None
-        self._load_model()
+    def __init__(self, registry=model_registry, cache=None):
+        # The model is loaded on first use (or by the startup warmup), not at import time
+        self.registry = registry
+        # Churn probabilities keyed by "<model version>:<record digest>" (None = no caching)
+        self.cache = cache if cache is not None else build_cache(
+            settings.PREDICTION_CACHE_BACKEND, settings.PREDICTION_CACHE_SIZE,
+            ttl_s=settings.PREDICTION_CACHE_TTL_S, url=settings.PREDICTION_CACHE_REDIS_URL, prefix="churn:predict:"
+        )
+        if self.cache is not None:
+            self.registry.add_listener(self._on_model_swap)
+
+    def _on_model_swap(self, bundle):
+        # Keys carry the model version, so this only frees entries that can no longer be hit
+        self.cache.clear()
 
     def _load_model(self):
         try:
-            self.model = joblib.load(settings.MODEL_PATH)
-            logger.info("Model loaded successfully.")
+            return self.registry.get()
         except Exception as e:
-            logger.error(f"Failed to load model from {settings.MODEL_PATH}: {e}")
+            logger.error(f"Failed to load model from {self.registry.model_path}: {e}")
             # Fallback or re-raise depending on policy. For now, log.
-    
+            return None
+
+    def _bundle(self):
+        """
+        Returns the shared model bundle. Each call site takes one snapshot and uses it
+        for the whole request.
+        """
+        bundle = self._load_model()
+        if bundle is None:
+            raise ValueError("Model not loaded.")
+        return bundle
+
+    @property
+    def model(self):
+        bundle = self._load_model()
+        return bundle.pipeline if bundle else None
+
+    @staticmethod
+    def label(probability: float, threshold: float) -> int:
+        return int(probability > threshold)
+
     def predict(self, input_df: pd.DataFrame):
         """
         Returns a dictionary with probability and prediction.
         """
-        if self.model is None:
-            self._load_model()
-            if self.model is None:
-                raise ValueError("Model not loaded.")
-        
+        bundle = self._bundle()
+
+        try:
+            # Single model pass: the label is derived from the probability
+            # (the pipeline's two steps run separately so each is timed)
+            with stage_timer("transform"):
+                X = bundle.preprocessor.transform(input_df)
+            with stage_timer("predict_proba"):
+                probability = float(bundle.classifier.predict_proba(X)[0][1])
+
+            return {
+                "churn_prediction": self.label(probability, bundle.threshold),
+                "churn_probability": probability
+            }
+        except Exception as e:
+            logger.error(f"Prediction error: {e}")
+            raise e
+
+    def predict_record(self, record: dict):
+        """
+        Fast path for a single customer: encodes the record straight into a NumPy row
+        and calls the classifier directly. Falls back to the DataFrame path if the
+        encoder could not be compiled for this model. Served from the prediction
+        cache when the same record was scored by the same model before.
+        """
+        bundle = self._bundle()
+
+        key = f"{bundle.version}:{record_digest(record)}" if self.cache is not None else None
+        probability = self.cache.get(key) if key else None
+        if probability is not None:
+            return {
+                "churn_prediction": self.label(probability, bundle.threshold),
+                "churn_probability": probability
+            }
+
+        if bundle.encoder is None:
+            with stage_timer("dataframe_build"):
+                df = pd.DataFrame([record])
+            result = self.predict(df)
+            if key:
+                self.cache.set(key, result["churn_probability"])
+            return result
+
         try:
-            prediction = self.model.predict(input_df)[0]
-            probability = self.model.predict_proba(input_df)[0][1]
-            
+            with stage_timer("encode"):
+                X = bundle.encoder.encode(record)
+            with stage_timer("predict_proba"):
+                probability = float(bundle.classifier.predict_proba(X)[0][1])
+            if key:
+                self.cache.set(key, probability)
+
             return {
-                "churn_prediction": int(prediction),
-                "churn_probability": float(probability)
+                "churn_prediction": self.label(probability, bundle.threshold),
+                "churn_probability": probability
             }
         except Exception as e:
             logger.error(f"Prediction error: {e}")
             raise e
 
+    def score_encoded(self, bundle, X_encoded, dmatrix=None):
+        """
+        Churn probabilities for rows already encoded with `bundle`'s preprocessor.
+        With a DMatrix (shared with the xgboost explanation backend) the booster scores it directly.
+        """
+        with stage_timer("predict_proba"):
+            if dmatrix is not None:
+                return bundle.classifier.get_booster().predict(dmatrix)
+            return bundle.classifier.predict_proba(X_encoded)[:, 1]
+
+    def predict_records(self, records):
+        """
+        Scores a list of raw records in one classifier call and returns one result dict per record.
+        Used by the micro-batcher to score coalesced /predict requests together.
+        Cached records are not rescored.
+        """
+        bundle = self._bundle()
+
+        probabilities = [None] * len(records)
+        keys = None
+        if self.cache is not None:
+            keys = [f"{bundle.version}:{record_digest(record)}" for record in records]
+            probabilities = [self.cache.get(key) for key in keys]
+        missing = [i for i, p in enumerate(probabilities) if p is None]
+
+        if missing:
+            pending = [records[i] for i in missing]
+            try:
+                if bundle.encoder is None:
+                    with stage_timer("transform"):
+                        X = bundle.preprocessor.transform(pd.DataFrame(pending))
+                else:
+                    with stage_timer("encode"):
+                        X = bundle.encoder.encode_many(pending)
+                with stage_timer("predict_proba"):
+                    scored = bundle.classifier.predict_proba(X)[:, 1]
+            except Exception as e:
+                logger.error(f"Prediction error: {e}")
+                raise e
+            for i, p in zip(missing, scored.tolist()):
+                probabilities[i] = p
+                if keys:
+                    self.cache.set(keys[i], p)
+
+        return [
+            {"churn_prediction": self.label(p, bundle.threshold), "churn_probability": p}
+            for p in probabilities
+        ]
+
+    def predict_batch(self, input_df: pd.DataFrame, chunk_size: int = None):
+        """
+        Scores many customers at once, one predict_proba call per chunk.
+        Chunking keeps the encoded matrix bounded for very large batches.
+        Returns probabilities and predictions in input order plus per-chunk latencies (ms).
+        """
+        bundle = self._bundle()
+
+        chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
+        probabilities = []
+        chunk_latency_ms = []
+
+        try:
+            for start in range(0, len(input_df), chunk_size):
+                chunk = input_df.iloc[start:start + chunk_size]
+                t0 = time.perf_counter()
+                with stage_timer("transform"):
+                    X = bundle.preprocessor.transform(chunk)
+                with stage_timer("predict_proba"):
+                    probabilities.extend(bundle.classifier.predict_proba(X)[:, 1].tolist())
+                chunk_latency_ms.append((time.perf_counter() - t0) * 1000)
+        except Exception as e:
+            logger.error(f"Batch prediction error: {e}")
+            raise e
+
+        predictions = [self.label(p, bundle.threshold) for p in probabilities]
+
+        logger.info(f"Scored batch of {len(input_df)} rows in {len(chunk_latency_ms)} chunk(s)")
+        return {
+            "churn_probability": probabilities,
+            "churn_prediction": predictions,
+            "chunk_latency_ms": chunk_latency_ms
+        }
+
 # Global instance
 predictor = ChurnPredictor()
+CACHES.track("prediction", predictor.cache)
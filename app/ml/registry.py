@@ -0,0 +1,311 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+import joblib
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import MODEL_LOAD_SECONDS, MODEL_WARMUP_SECONDS
+from app.ml.metadata import load_metadata, save_metadata, DEFAULT_DECISION_THRESHOLD
+from app.ml.encoder import build_encoder
+from app.ml.compiled import CompiledModel, compiled_path, export_compiled
+
+ARTIFACT_NAME = "model.pkl"
+ACTIVE_POINTER = "ACTIVE"
+LEGACY_VERSION = "legacy"
+
+def _rss_bytes() -> int:
+    """
+    Current resident set size of this process (Linux /proc, 0 if unavailable).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class ModelBundle:
+    """
+    Everything derived from one model artifact: the fitted pipeline, its steps,
+    the compiled feature encoder, the decision threshold and the saved metadata.
+
+    Bundles are immutable once published. Services snapshot the active bundle at the
+    start of a request, so a model swap never changes the model under an in-flight request.
+    """
+
+    def __init__(self, version: str, path: str, pipeline, metadata: dict, load_time_s: float, rss_delta_bytes: int):
+        self.version = version
+        self.path = path
+        self.pipeline = pipeline
+        self.classifier = pipeline.named_steps['classifier']
+        self.preprocessor = pipeline.named_steps['preprocessor']
+        self.encoder = build_encoder(self.preprocessor)
+        self.metadata = metadata
+        self.threshold = self._resolve_threshold(metadata)
+        self.load_time_s = load_time_s
+        self.rss_delta_bytes = rss_delta_bytes
+        self.artifact_bytes = os.path.getsize(path)
+        # Objects services derive from this model (e.g. the SHAP explainer); they live and die with the bundle
+        self.derived = {}
+
+    @staticmethod
+    def _resolve_threshold(metadata: dict) -> float:
+        """
+        Environment override first, then the threshold saved with the model, then 0.5.
+        """
+        if settings.DECISION_THRESHOLD:
+            return float(settings.DECISION_THRESHOLD)
+        return float(metadata.get("decision_threshold", DEFAULT_DECISION_THRESHOLD))
+
+    def warmup(self):
+        """
+        Runs a few predictions so lazy initialisation happens before the bundle takes traffic.
+        """
+        if self.encoder is None:
+            logger.warning(f"Skipping warmup for model {self.version}: no compiled encoder.")
+            return
+        t0 = time.perf_counter()
+        self.classifier.predict_proba(self.encoder.encode_many(self.encoder.probe_records()))
+        MODEL_WARMUP_SECONDS.labels(self.version).set(time.perf_counter() - t0)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "load_time_s": round(self.load_time_s, 4),
+            "artifact_bytes": self.artifact_bytes,
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "decision_threshold": self.threshold,
+            "fast_encoder": self.encoder is not None
+        }
+
+class ModelRegistry:
+    """
+    Loads model artifacts once per process and hands the same objects to every
+    service (ChurnPredictor, ShapExplainer, ...).
+
+    Versions live in `registry_dir/<version>/model.pkl` with a `model.json` metadata file
+    next to them, and `registry_dir/ACTIVE` names the version to serve. Without a
+    registry the single artifact at `model_path` is served as version "legacy".
+    """
+
+    def __init__(self, model_path: str, registry_dir: str, mmap: bool = False):
+        self.model_path = model_path
+        self.registry_dir = registry_dir
+        self.mmap = mmap
+        self._bundle = None
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._listeners = []
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    # --- Serving ---
+
+    def get(self) -> ModelBundle:
+        """
+        Returns the active bundle, loading it on first use.
+        """
+        bundle = self._bundle
+        if bundle is None:
+            with self._lock:
+                if self._bundle is None:
+                    version = self.read_active_version()
+                    self._bundle = self._load(version, self._artifact_path(version))
+                bundle = self._bundle
+        return bundle
+
+    def add_listener(self, callback):
+        """
+        Registers `callback(bundle)`, called after every model swap (e.g. to drop caches).
+        """
+        self._listeners.append(callback)
+
+    def activate(self, version: str) -> ModelBundle:
+        """
+        Loads and warms up `version`, then atomically makes it the active model.
+        Requests already running keep the bundle they started with.
+        """
+        path = self._artifact_path(version)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model version {version} not found at {path}")
+
+        with self._swap_lock:
+            bundle = self._load(version, path)
+            bundle.warmup()
+
+            with self._lock:
+                previous, self._bundle = self._bundle, bundle
+            self._write_active_version(version)
+
+        logger.info(f"Activated model {version} (previous: {previous.version if previous else None})")
+        for callback in self._listeners:
+            try:
+                callback(bundle)
+            except Exception as e:
+                logger.error(f"Model swap listener failed: {e}")
+        return bundle
+
+    def load_version(self, version: str) -> ModelBundle:
+        """
+        Loads a specific version without making it active (e.g. in offline scoring workers).
+        """
+        return self._load(version, self._artifact_path(version))
+
+    def load_compiled(self, version: str = None) -> CompiledModel:
+        """
+        Loads the NumPy-only compiled artifact of `version` (default: the ACTIVE one).
+        The pickled pipeline is never loaded, so pandas/sklearn/xgboost are not imported.
+        """
+        version = version or self.read_active_version()
+        path = compiled_path(self._artifact_path(version))
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No compiled artifact for model version {version} at {path}")
+        t0 = time.perf_counter()
+        model = CompiledModel.load(path, version)
+        logger.info(f"Compiled model {version} loaded from {path} in {time.perf_counter() - t0:.3f}s ({model.n_trees} trees)")
+        return model
+
+    def reload(self) -> ModelBundle:
+        """
+        Activates whatever version the ACTIVE pointer names, if it differs from the served one.
+        """
+        version = self.read_active_version()
+        if self._bundle is not None and self._bundle.version == version:
+            return self._bundle
+        return self.activate(version)
+
+    def _load(self, version: str, path: str) -> ModelBundle:
+        rss_before = _rss_bytes()
+        t0 = time.perf_counter()
+        try:
+            # With mmap_mode, NumPy arrays in the pickle are mapped read-only from disk,
+            # so workers forked from the same parent share those pages
+            pipeline = joblib.load(path, mmap_mode='r' if self.mmap else None)
+        except Exception as e:
+            logger.error(f"Failed to load model from {path}: {e}")
+            raise
+        load_time_s = time.perf_counter() - t0
+        MODEL_LOAD_SECONDS.labels(version).set(load_time_s)
+
+        bundle = ModelBundle(version, path, pipeline, load_metadata(path), load_time_s, _rss_bytes() - rss_before)
+        logger.info(
+            f"Model {version} loaded from {path} in {load_time_s:.3f}s "
+            f"(artifact {bundle.artifact_bytes / 1e6:.1f} MB, RSS +{bundle.rss_delta_bytes / 1e6:.1f} MB, "
+            f"decision threshold {bundle.threshold})"
+        )
+        return bundle
+
+    # --- Versions on disk ---
+
+    def _artifact_path(self, version: str) -> str:
+        if version == LEGACY_VERSION:
+            return self.model_path
+        if os.path.basename(version) != version or version.startswith("."):
+            raise ValueError(f"Invalid model version: {version}")
+        return os.path.join(self.registry_dir, version, ARTIFACT_NAME)
+
+    def read_active_version(self) -> str:
+        """
+        Version named by the ACTIVE pointer, or "legacy" if there is no registry yet.
+        """
+        pointer = os.path.join(self.registry_dir, ACTIVE_POINTER)
+        try:
+            with open(pointer) as f:
+                version = f.read().strip()
+        except OSError:
+            return LEGACY_VERSION
+        return version or LEGACY_VERSION
+
+    def _write_active_version(self, version: str):
+        # Write-then-rename so the watcher never sees a half-written pointer
+        pointer = os.path.join(self.registry_dir, ACTIVE_POINTER)
+        if version == LEGACY_VERSION:
+            if os.path.exists(pointer):
+                os.remove(pointer)
+            return
+        os.makedirs(self.registry_dir, exist_ok=True)
+        tmp = pointer + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(version)
+        os.replace(tmp, pointer)
+
+    def list_versions(self) -> list:
+        """
+        All registered versions with their metadata, newest first.
+        """
+        active = self._bundle.version if self._bundle else self.read_active_version()
+        versions = []
+        if os.path.isdir(self.registry_dir):
+            for version in sorted(os.listdir(self.registry_dir), reverse=True):
+                path = self._artifact_path(version)
+                if os.path.exists(path):
+                    versions.append({"version": version, "active": version == active, "metadata": load_metadata(path)})
+        if os.path.exists(self.model_path):
+            versions.append({"version": LEGACY_VERSION, "active": active == LEGACY_VERSION, "metadata": load_metadata(self.model_path)})
+        return versions
+
+    def publish(self, pipeline, metadata: dict, activate: bool = False) -> str:
+        """
+        Stores a trained pipeline as a new version. With `activate`, the ACTIVE pointer is
+        moved to it, which running servers pick up through the file watcher.
+        """
+        os.makedirs(self.registry_dir, exist_ok=True)
+        while True:
+            # Microseconds keep names unique and sortable; creating the directory claims the
+            # name, so an existing (possibly active) version is never overwritten
+            version = datetime.now(timezone.utc).strftime("v%Y%m%d-%H%M%S-%f")
+            version_dir = os.path.join(self.registry_dir, version)
+            try:
+                os.makedirs(version_dir, exist_ok=False)
+                break
+            except FileExistsError:
+                continue
+
+        path = os.path.join(version_dir, ARTIFACT_NAME)
+        joblib.dump(pipeline, path)
+        export_compiled(pipeline, path)
+        save_metadata(path, {"version": version, **metadata})
+        logger.info(f"Published model version {version} to {version_dir}")
+
+        if activate:
+            self._write_active_version(version)
+        return version
+
+    # --- File watch ---
+
+    def start_watcher(self, interval_s: float):
+        """
+        Polls the ACTIVE pointer in a daemon thread and hot-swaps the model when it changes.
+        """
+        if interval_s <= 0 or self._watcher is not None:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval_s,), name="model-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching {self.registry_dir} for model changes every {interval_s}s")
+
+    def stop_watcher(self):
+        self._stop_watching.set()
+        self._watcher = None
+
+    def _watch(self, interval_s: float):
+        failed_version = None
+        while not self._stop_watching.wait(interval_s):
+            version = self.read_active_version()
+            # Only swap once a model is being served, and do not retry a version that failed to load
+            if self._bundle is None or version == self._bundle.version or version == failed_version:
+                continue
+            try:
+                self.activate(version)
+                failed_version = None
+            except Exception as e:
+                failed_version = version
+                logger.error(f"Model hot reload of {version} failed: {e}")
+
+    def stats(self) -> dict:
+        if self._bundle is None:
+            return {"loaded": False, "active_version": self.read_active_version()}
+        return {"loaded": True, "mmap": self.mmap, **self._bundle.stats()}
+
+model_registry = ModelRegistry(settings.MODEL_PATH, settings.MODEL_REGISTRY_DIR, mmap=settings.MODEL_MMAP)
@@ -0,0 +1,339 @@
+"""
+Offline bulk scoring.
+
+Streams a customer file (CSV or Parquet) in fixed-size chunks through the active model
+and writes probabilities, labels and optionally the top-k SHAP drivers incrementally,
+so memory stays bounded regardless of input size. With --workers, row ranges of the
+input are sharded across a process pool and the outputs merged in order.
+
+    python -m app.ml.score customers.csv scores.csv --chunk-size 50000 --top-k 3 --workers 4
+    python -m app.ml.score customers.csv scores.csv --scaling 1 2 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.core.logger import logger
+from app.data.loader import clean_frame
+from app.ml.registry import model_registry
+
+def _file_format(path: str, explicit: str = None) -> str:
+    if explicit:
+        return explicit
+    return "parquet" if os.path.splitext(path)[1].lower() in (".parquet", ".pq") else "csv"
+
+def iter_chunks(path: str, chunk_size: int, file_format: str = None):
+    """
+    Yields DataFrames of at most `chunk_size` rows from a CSV or Parquet file.
+    """
+    if _file_format(path, file_format) == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+class ChunkWriter:
+    """
+    Appends scored chunks to a CSV or Parquet file as they are produced.
+    """
+
+    def __init__(self, path: str, file_format: str = None):
+        self.path = path
+        self.file_format = _file_format(path, file_format)
+        self._writer = None
+        self._header_written = False
+
+    def write(self, df: pd.DataFrame):
+        if self.file_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a" if self._header_written else "w", header=not self._header_written, index=False)
+            self._header_written = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+def score_chunk(bundle, chunk: pd.DataFrame, top_k: int = 0, explainer=None) -> pd.DataFrame:
+    """
+    Scores one chunk with a single vectorized transform + predict_proba call.
+    Returns customerID (if present), churn_probability, churn_prediction and optional drivers.
+    """
+    chunk = clean_frame(chunk)
+    X = bundle.preprocessor.transform(chunk)
+    probabilities = bundle.classifier.predict_proba(X)[:, 1]
+
+    out = pd.DataFrame(index=chunk.index)
+    if 'customerID' in chunk.columns:
+        out['customerID'] = chunk['customerID'].values
+    out['churn_probability'] = probabilities
+    out['churn_prediction'] = (probabilities > bundle.threshold).astype(np.int8)
+
+    if top_k > 0:
+        X = X.toarray() if hasattr(X, 'toarray') else np.asarray(X, dtype=np.float64)
+        contributions = explainer.contributions(bundle, X)
+        feature_names = np.asarray(explainer.feature_names(bundle))
+        top = np.argsort(-np.abs(contributions), axis=1)[:, :top_k]
+        for rank in range(top.shape[1]):
+            out[f'driver_{rank + 1}'] = feature_names[top[:, rank]]
+            out[f'driver_{rank + 1}_shap'] = np.take_along_axis(contributions, top[:, rank:rank + 1], axis=1)[:, 0]
+    return out.reset_index(drop=True)
+
+def score_file(input_path: str, output_path: str, chunk_size: int = None, top_k: int = 0,
+               input_format: str = None, output_format: str = None, workers: int = 1,
+               threads_per_worker: int = 1) -> dict:
+    """
+    Scores `input_path` chunk by chunk into `output_path` and returns run statistics.
+    """
+    chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
+    if workers > 1:
+        return _score_file_parallel(input_path, output_path, chunk_size, top_k, input_format, output_format,
+                                    workers, threads_per_worker)
+
+    bundle = model_registry.get()
+    explainer = None
+    if top_k > 0:
+        from app.explainability.shap_explainer import shap_service as explainer
+
+    logger.info(f"Scoring {input_path} -> {output_path} with model {bundle.version} (chunk size {chunk_size})")
+    writer = ChunkWriter(output_path, output_format)
+    n_rows, n_chunks = 0, 0
+    t0 = time.perf_counter()
+    try:
+        for chunk in iter_chunks(input_path, chunk_size, input_format):
+            writer.write(score_chunk(bundle, chunk, top_k, explainer))
+            n_rows += len(chunk)
+            n_chunks += 1
+            elapsed = time.perf_counter() - t0
+            logger.info(f"Scored {n_rows} rows ({n_chunks} chunks, {n_rows / elapsed:,.0f} rows/s)")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "rows": n_rows,
+        "chunks": n_chunks,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": n_rows / elapsed if elapsed else 0.0,
+        "model_version": bundle.version
+    }
+    logger.info(f"Scoring finished: {stats}")
+    return stats
+
+# --- Multi-process scoring ---
+
+class _ByteRangeReader:
+    """
+    Read-only file-like view of bytes [start, end) of a file, so pandas can parse one shard.
+    """
+
+    def __init__(self, f, start: int, end: int):
+        f.seek(start)
+        self._f = f
+        self._remaining = end - start
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+def plan_shards(path: str, n_shards: int, file_format: str = None) -> list:
+    """
+    Splits the input into contiguous row ranges: newline-aligned byte ranges for CSV,
+    groups of row groups for Parquet. Shards are returned in file order.
+    """
+    if _file_format(path, file_format) == "parquet":
+        import pyarrow.parquet as pq
+
+        n_groups = pq.ParquetFile(path).num_row_groups
+        groups = [list(g) for g in np.array_split(np.arange(n_groups), min(n_shards, n_groups)) if len(g)]
+        return [{"row_groups": [int(i) for i in g]} for g in groups]
+
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()  # header
+        boundaries = [f.tell()]
+        data_size = size - boundaries[0]
+        for i in range(1, n_shards):
+            f.seek(boundaries[0] + data_size * i // n_shards)
+            f.readline()  # move to the start of the next full line
+            boundaries.append(max(f.tell(), boundaries[-1]))
+        boundaries.append(size)
+    return [{"start": a, "end": b} for a, b in zip(boundaries, boundaries[1:]) if b > a]
+
+def _iter_shard(path: str, shard: dict, chunk_size: int, file_format: str = None):
+    if "row_groups" in shard:
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunk_size, row_groups=shard["row_groups"]):
+            yield batch.to_pandas()
+        return
+
+    columns = pd.read_csv(path, nrows=0).columns.tolist()
+    with open(path, "rb") as f:
+        yield from pd.read_csv(
+            _ByteRangeReader(f, shard["start"], shard["end"]),
+            header=None, names=columns, chunksize=chunk_size
+        )
+
+_worker_state = {}
+
+def _init_worker(version: str, top_k: int, threads: int):
+    """
+    Loads the model once per worker process.
+    """
+    if model_registry.read_active_version() == version:
+        bundle = model_registry.get()
+    else:
+        bundle = model_registry.load_version(version)
+    # One scoring thread per worker by default, the pool provides the parallelism
+    bundle.classifier.set_params(n_jobs=threads)
+
+    explainer = None
+    if top_k > 0:
+        from app.explainability.shap_explainer import shap_service as explainer
+    _worker_state.update(bundle=bundle, top_k=top_k, explainer=explainer)
+
+def _score_shard(task: tuple) -> int:
+    input_path, shard, part_path, chunk_size, input_format, output_format = task
+    writer = ChunkWriter(part_path, output_format)
+    n_rows = 0
+    try:
+        for chunk in _iter_shard(input_path, shard, chunk_size, input_format):
+            writer.write(score_chunk(_worker_state["bundle"], chunk, _worker_state["top_k"], _worker_state["explainer"]))
+            n_rows += len(chunk)
+    finally:
+        writer.close()
+    return n_rows
+
+def _merge_parts(part_paths: list, output_path: str, file_format: str):
+    """
+    Concatenates per-shard outputs into the final file, in shard order.
+    """
+    part_paths = [p for p in part_paths if os.path.exists(p)]
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for part in part_paths:
+                pf = pq.ParquetFile(part)
+                for i in range(pf.num_row_groups):
+                    table = pf.read_row_group(i)
+                    if writer is None:
+                        writer = pq.ParquetWriter(output_path, table.schema)
+                    writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    with open(output_path, "wb") as out:
+        for i, part in enumerate(part_paths):
+            with open(part, "rb") as f:
+                if i > 0:
+                    f.readline()  # each part carries its own header
+                shutil.copyfileobj(f, out)
+
+def _score_file_parallel(input_path, output_path, chunk_size, top_k, input_format, output_format,
+                         workers, threads_per_worker) -> dict:
+    version = model_registry.read_active_version()
+    output_format = _file_format(output_path, output_format)
+    # A few shards per worker keeps the pool busy when shards score at different speeds
+    shards = plan_shards(input_path, workers * 4, input_format)
+
+    logger.info(f"Scoring {input_path} -> {output_path} with model {version}: {len(shards)} shards on {workers} workers")
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as tmp_dir:
+        part_paths = [os.path.join(tmp_dir, f"part-{i:05d}.{output_format}") for i in range(len(shards))]
+        tasks = [
+            (input_path, shard, part, chunk_size, input_format, output_format)
+            for shard, part in zip(shards, part_paths)
+        ]
+
+        # spawn: forking after XGBoost/OpenMP has started threads can deadlock
+        ctx = multiprocessing.get_context("spawn")
+        n_rows = 0
+        with ctx.Pool(workers, initializer=_init_worker, initargs=(version, top_k, threads_per_worker)) as pool:
+            for i, rows in enumerate(pool.imap(_score_shard, tasks)):
+                n_rows += rows
+                elapsed = time.perf_counter() - t0
+                logger.info(f"Scored {n_rows} rows ({i + 1}/{len(shards)} shards, {n_rows / elapsed:,.0f} rows/s)")
+
+        _merge_parts(part_paths, output_path, output_format)
+
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "rows": n_rows,
+        "shards": len(shards),
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": n_rows / elapsed if elapsed else 0.0,
+        "model_version": version
+    }
+    logger.info(f"Scoring finished: {stats}")
+    return stats
+
+def measure_scaling(input_path: str, worker_counts: list, chunk_size: int = None, top_k: int = 0,
+                    input_format: str = None, output_format: str = "csv") -> list:
+    """
+    Scores the same input with each worker count and reports speedup and parallel
+    efficiency (speedup / workers) relative to the first count.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for workers in worker_counts:
+            output_path = os.path.join(tmp_dir, f"scores-{workers}.{output_format}")
+            stats = score_file(input_path, output_path, chunk_size, top_k, input_format, output_format, workers)
+            results.append({"workers": workers, "seconds": stats["seconds"], "rows_per_s": stats["rows_per_s"]})
+
+    baseline = results[0]
+    for r in results:
+        r["speedup"] = r["rows_per_s"] / baseline["rows_per_s"] if baseline["rows_per_s"] else 0.0
+        r["efficiency"] = r["speedup"] * baseline["workers"] / r["workers"]
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a customer file through the churn model.")
+    parser.add_argument("input", help="Input CSV or Parquet file")
+    parser.add_argument("output", help="Output CSV or Parquet file")
+    parser.add_argument("--chunk-size", type=int, default=settings.BATCH_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--top-k", type=int, default=0, help="Also write the top-k SHAP drivers per customer")
+    parser.add_argument("--input-format", choices=["csv", "parquet"], help="Override format detection from the extension")
+    parser.add_argument("--output-format", choices=["csv", "parquet"], help="Override format detection from the extension")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (input is sharded by row ranges)")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="XGBoost threads inside each worker")
+    parser.add_argument("--scaling", type=int, nargs="+", metavar="N",
+                        help="Benchmark these worker counts instead of scoring and print speedup/efficiency as JSON")
+    args = parser.parse_args()
+
+    if args.scaling:
+        results = measure_scaling(args.input, args.scaling, args.chunk_size, args.top_k, args.input_format,
+                                  _file_format(args.output, args.output_format))
+        print(json.dumps(results, indent=2))
+        return
+
+    score_file(args.input, args.output, args.chunk_size, args.top_k, args.input_format, args.output_format,
+               args.workers, args.threads_per_worker)
+
+if __name__ == "__main__":
+    main()
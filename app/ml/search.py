@@ -0,0 +1,158 @@
+"""
+Hyperparameter search for the XGBoost classifier.
+
+Features are encoded once by the caller; the encoded matrices are written to .npy files that
+every worker process memory-maps, so no trial refits the ColumnTransformer or copies the data.
+Each trial trains with early stopping on the validation split.
+"""
+import itertools
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+from xgboost import XGBClassifier
+from sklearn.metrics import roc_auc_score
+from app.core.config import settings
+from app.core.logger import logger
+
+DEFAULT_SEARCH_SPACE = {
+    "max_depth": [3, 4, 5, 6, 8],
+    "learning_rate": [0.02, 0.05, 0.1, 0.2],
+    "min_child_weight": [1, 3, 5, 10],
+    "subsample": [0.7, 0.85, 1.0],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+    "reg_lambda": [0.5, 1.0, 5.0]
+}
+
+# Fixed for every trial; n_estimators is an upper bound, early stopping picks the actual count
+BASE_PARAMS = {
+    "eval_metric": "logloss",
+    "random_state": 42,
+    "tree_method": settings.TRAIN_TREE_METHOD,
+    "max_bin": settings.TRAIN_MAX_BIN
+}
+
+# Set by the search itself for every trial, so a search space cannot vary them
+RESERVED_PARAMS = ("n_estimators", "early_stopping_rounds", "n_jobs")
+
+def load_search_space(path: str = None) -> dict:
+    """
+    Search space as {param: [candidate values]}, from a JSON file or the default above.
+    Parameters in BASE_PARAMS may be searched (they are overridden); RESERVED_PARAMS may not.
+    """
+    if not path:
+        return DEFAULT_SEARCH_SPACE
+    with open(path) as f:
+        space = json.load(f)
+    if not isinstance(space, dict) or not all(isinstance(v, list) and v for v in space.values()):
+        raise ValueError(f"Search space {path} must be a JSON object of {{param: [candidate values]}}")
+    reserved = sorted(set(space) & set(RESERVED_PARAMS))
+    if reserved:
+        raise ValueError(
+            f"Search space {path} sets {reserved}, which the search controls "
+            f"(use SEARCH_MAX_ESTIMATORS, SEARCH_EARLY_STOPPING_ROUNDS and --workers instead)"
+        )
+    return space
+
+def sample_trials(space: dict, n_trials: int, seed: int = 42) -> list:
+    """
+    `n_trials` distinct parameter combinations drawn at random from `space`
+    (the full grid if it has fewer combinations).
+    """
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    if len(grid) <= n_trials:
+        return grid
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in rng.choice(len(grid), size=n_trials, replace=False)]
+
+_worker_state = {}
+
+def _init_worker(matrix_dir: str, threads: int, max_estimators: int, early_stopping_rounds: int):
+    """
+    Maps the shared encoded matrices once per worker process.
+    """
+    arrays = {name: np.load(os.path.join(matrix_dir, f"{name}.npy"), mmap_mode='r')
+              for name in ("X_train", "y_train", "X_val", "y_val")}
+    _worker_state.update(arrays, threads=threads, max_estimators=max_estimators,
+                         early_stopping_rounds=early_stopping_rounds)
+
+def _run_trial(task: tuple) -> dict:
+    trial_id, params = task
+    state = _worker_state
+    t0 = time.perf_counter()
+    classifier = XGBClassifier(**{
+        **BASE_PARAMS,
+        **params,
+        "n_estimators": state["max_estimators"],
+        "early_stopping_rounds": state["early_stopping_rounds"],
+        "n_jobs": state["threads"]
+    })
+    classifier.fit(state["X_train"], state["y_train"], eval_set=[(state["X_val"], state["y_val"])], verbose=False)
+    val_roc_auc = roc_auc_score(state["y_val"], classifier.predict_proba(state["X_val"])[:, 1])
+    return {
+        "trial": trial_id,
+        "params": params,
+        "best_iteration": int(classifier.best_iteration),
+        "val_logloss": float(classifier.best_score),
+        "val_roc_auc": float(val_roc_auc),
+        "seconds": time.perf_counter() - t0,
+        "classifier": classifier
+    }
+
+def run_search(X_train, y_train, X_val, y_val, trials: list, workers: int, max_estimators: int,
+               early_stopping_rounds: int) -> dict:
+    """
+    Runs `trials` across `workers` processes and returns the best trial (by validation ROC-AUC)
+    with its fitted classifier, plus per-trial results and the total wall time.
+    """
+    workers = max(1, min(workers, len(trials)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    t0 = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="search-") as matrix_dir:
+        for name, array in (("X_train", X_train), ("y_train", y_train), ("X_val", X_val), ("y_val", y_val)):
+            np.save(os.path.join(matrix_dir, f"{name}.npy"), np.asarray(array))
+
+        initargs = (matrix_dir, threads, max_estimators, early_stopping_rounds)
+        tasks = list(enumerate(trials))
+        results = []
+        if workers == 1:
+            _init_worker(*initargs)
+            trial_results = map(_run_trial, tasks)
+        else:
+            # spawn: forking after XGBoost/OpenMP has started threads can deadlock
+            ctx = multiprocessing.get_context("spawn")
+            pool = ctx.Pool(workers, initializer=_init_worker, initargs=initargs)
+            trial_results = pool.imap_unordered(_run_trial, tasks)
+        try:
+            for result in trial_results:
+                results.append(result)
+                logger.info(
+                    f"Trial {result['trial']}: val ROC-AUC {result['val_roc_auc']:.4f}, "
+                    f"{result['best_iteration'] + 1} trees, {result['seconds']:.2f}s, params {result['params']}"
+                )
+        finally:
+            if workers > 1:
+                pool.close()
+                pool.join()
+            _worker_state.clear()
+
+    wall_time_s = time.perf_counter() - t0
+    results.sort(key=lambda r: r["trial"])
+    best = max(results, key=lambda r: (r["val_roc_auc"], -r["val_logloss"]))
+    trial_seconds = sum(r["seconds"] for r in results)
+    logger.info(
+        f"Search finished: {len(results)} trials on {workers} worker(s) in {wall_time_s:.2f}s "
+        f"({trial_seconds / len(results):.2f}s per trial); best trial {best['trial']} "
+        f"val ROC-AUC {best['val_roc_auc']:.4f}"
+    )
+    return {
+        "best": best,
+        "trials": [{k: v for k, v in r.items() if k != "classifier"} for r in results],
+        "workers": workers,
+        "threads_per_worker": threads,
+        "wall_time_s": wall_time_s,
+        "trial_seconds_total": trial_seconds
+    }
@@ -8,78 +8,331 @@ from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from xgboost import XGBClassifier
 from sklearn.metrics import classification_report, roc_auc_score, confusion_matrix
 import logging
+import argparse
+import os
+import tempfile
+import time
+import xgboost as xgb
+from datetime import datetime, timezone
 from app.core.logger import logger
 from app.core.config import settings
-from app.data.loader import load_data, preprocess_data
+from app.data.loader import load_data, preprocess_data, clean_frame, NUMERIC_DTYPES, CSV_DTYPES
+from app.ml.metadata import save_metadata, DEFAULT_DECISION_THRESHOLD
+from app.ml.registry import model_registry
+from app.ml.compiled import export_compiled
+from app.ml.matrix_cache import MatrixCache, TrainingMatrices, dataset_key
+from app.ml.search import BASE_PARAMS, load_search_space, sample_trials, run_search
 
-def train_model():
+def save_model(model, metadata: dict, activate: bool = True):
     """
-    Trains the churn prediction model and saves it.
+    Publishes the fitted pipeline as a new registry version. With `activate`, running API
+    servers watching the registry swap to it without a restart, and it also replaces the
+    MODEL_PATH artifact served as version "legacy"; a candidate never touches MODEL_PATH.
+    Returns the registry version.
     """
-    logger.info("Starting model training pipeline...")
-    
-    # 1. Load Data
-    try:
-        df = load_data(settings.DATA_PATH)
-    except FileNotFoundError:
-        logger.error("Data file not found. Please ensure data is available.")
-        return
+    metadata = {"trained_at": datetime.now(timezone.utc).isoformat(), **metadata}
+    version = model_registry.publish(model, metadata, activate=activate)
+    if activate:
+        _save_legacy_artifact(model, {"published_version": version, **metadata})
+    return version
 
-    df = preprocess_data(df)
-    
-    X = df.drop(columns=['Churn'])
-    y = df['Churn']
-    
-    # 2. Split Data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-    
-    # 3. Define Preprocessing Pipeline
-    categorical_cols = X.select_dtypes(include=['object']).columns.tolist()
-    numerical_cols = X.select_dtypes(exclude=['object']).columns.tolist()
+def _save_legacy_artifact(model, metadata: dict):
+    logger.info(f"Saving model to {settings.MODEL_PATH}")
+    if os.path.dirname(settings.MODEL_PATH):
+        os.makedirs(os.path.dirname(settings.MODEL_PATH), exist_ok=True)
+    # NumPy-only copy for the lightweight serving mode (app/main_compiled.py)
+    export_compiled(model, settings.MODEL_PATH)
+    save_metadata(settings.MODEL_PATH, metadata)
+    # Write-then-rename so a server (re)loading "legacy" never reads a half-written pickle
+    tmp = f"{settings.MODEL_PATH}.tmp"
+    joblib.dump(model, tmp)
+    os.replace(tmp, settings.MODEL_PATH)
+
+def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
+    """
+    Unfitted scaler + one-hot encoder for the columns of `X`.
+    """
+    numerical_cols = [col for col in X.columns if col in NUMERIC_DTYPES]
+    categorical_cols = [col for col in X.columns if col not in NUMERIC_DTYPES]
     
     logger.info(f"Categorical columns: {categorical_cols}")
     logger.info(f"Numerical columns: {numerical_cols}")
     
-    preprocessor = ColumnTransformer(
+    return ColumnTransformer(
         transformers=[
             ('num', StandardScaler(), numerical_cols),
             ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_cols)
         ]
     )
-    
-    # 4. Define Model (XGBoost)
-    model = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('classifier', XGBClassifier(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5,
-            eval_metric='logloss',
-            use_label_encoder=False,
-            random_state=42
-        ))
+
+def build_classifier(**params) -> XGBClassifier:
+    """
+    Unfitted XGBoost classifier with the default parameters, overridden by `params`.
+    Uses histogram tree building with TRAIN_MAX_BIN bins and TRAIN_NTHREAD threads.
+    """
+    return XGBClassifier(**{
+        "n_estimators": 100,
+        "learning_rate": 0.1,
+        "max_depth": 5,
+        "eval_metric": 'logloss',
+        "use_label_encoder": False,
+        "random_state": 42,
+        "tree_method": settings.TRAIN_TREE_METHOD,
+        "max_bin": settings.TRAIN_MAX_BIN,
+        "n_jobs": settings.TRAIN_NTHREAD or None,
+        **params
+    })
+
+def build_pipeline(X: pd.DataFrame) -> Pipeline:
+    """
+    Unfitted preprocessing + XGBoost pipeline for the columns of `X`.
+    """
+    return Pipeline(steps=[
+        ('preprocessor', build_preprocessor(X)),
+        ('classifier', build_classifier())
     ])
+
+def prepare_training_data(path: str, use_cache: bool = True) -> TrainingMatrices:
+    """
+    Loads `path`, splits it 80/20 and encodes both splits with a preprocessor fitted on
+    the training split. The result is cached in TRAIN_MATRIX_CACHE_DIR and reused
+    while the file is unchanged, skipping parsing and encoding.
+    """
+    cache = MatrixCache(settings.TRAIN_MATRIX_CACHE_DIR) if use_cache and settings.TRAIN_MATRIX_CACHE_DIR else None
+    key = dataset_key(path, test_size=0.2, random_state=42) if cache else None
+    if cache:
+        matrices = cache.load(key)
+        if matrices is not None:
+            logger.info(f"Using cached encoded matrices for {path} ({key})")
+            return matrices
+
+    df = preprocess_data(load_data(path))
+    
+    X = df.drop(columns=['Churn'])
+    y = df['Churn']
     
-    # 5. Train
-    logger.info("Training XGBoost model...")
-    model.fit(X_train, y_train)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
     
-    # 6. Evaluate
-    logger.info("Evaluating model...")
-    y_pred = model.predict(X_test)
+    preprocessor = build_preprocessor(X).fit(X_train)
+    matrices = TrainingMatrices(
+        preprocessor, preprocessor.transform(X_train), y_train, preprocessor.transform(X_test), y_test, X.columns.tolist()
+    )
+    if cache:
+        cache.save(key, matrices)
+    return matrices
+
+def evaluate_model(model, X_test, y_test, threshold: float) -> float:
+    """
+    Logs the classification report for a held-out set and returns its ROC-AUC.
+    `model` is a pipeline (raw features) or a classifier (encoded features).
+    """
     y_prob = model.predict_proba(X_test)[:, 1]
+    y_pred = (y_prob > threshold).astype(int)
     
     roc_auc = roc_auc_score(y_test, y_prob)
     logger.info(f"ROC-AUC Prediction: {roc_auc:.4f}")
     
     report = classification_report(y_test, y_pred)
     logger.info(f"\nClassification Report:\n{report}")
+    return float(roc_auc)
+
+def train_model(search: bool = False, n_trials: int = None, workers: int = None, search_space: str = None):
+    """
+    Trains the churn prediction model and saves it.
+    With `search`, runs a hyperparameter search instead of the fixed parameters and
+    promotes the best trial (see `_search_classifier`).
+    """
+    logger.info("Starting model training pipeline...")
     
-    # 7. Save Model
-    logger.info(f"Saving model to {settings.MODEL_PATH}")
-    joblib.dump(model, settings.MODEL_PATH)
+    # 1. Load, split and encode data (cached per dataset)
+    t0 = time.perf_counter()
+    try:
+        data = prepare_training_data(settings.DATA_PATH)
+    except FileNotFoundError:
+        logger.error("Data file not found. Please ensure data is available.")
+        return
+    X_train, X_test = data.dense(data.X_train), data.dense(data.X_test)
+    logger.info(f"Training matrices ready in {time.perf_counter() - t0:.2f}s: {X_train.shape[0]} train / {X_test.shape[0]} test rows, {X_train.shape[1]} features")
+    
+    # 2. Train (XGBoost)
+    t0 = time.perf_counter()
+    extra_metadata = {"training_mode": "full"}
+    if search:
+        classifier, extra_metadata = _search_classifier(X_train, data.y_train, n_trials, workers, search_space)
+    else:
+        logger.info("Training XGBoost model...")
+        classifier = build_classifier().fit(X_train, data.y_train)
+    logger.info(f"Model fitted in {time.perf_counter() - t0:.2f}s")
+    model = Pipeline(steps=[('preprocessor', data.preprocessor), ('classifier', classifier)])
+    
+    # 3. Evaluate
+    logger.info("Evaluating model...")
+    threshold = float(settings.DECISION_THRESHOLD or DEFAULT_DECISION_THRESHOLD)
+    roc_auc = evaluate_model(classifier, X_test, data.y_test, threshold)
+    
+    # 4. Save Model
+    save_model(model, {
+        **extra_metadata,
+        "decision_threshold": threshold,
+        "roc_auc": roc_auc,
+        "features": data.features,
+        "n_train_rows": int(len(data.y_train))
+    })
     
     return model, roc_auc
 
+def _search_classifier(X_train: np.ndarray, y_train, n_trials: int = None, workers: int = None,
+                       search_space: str = None):
+    """
+    Hyperparameter search over encoded training rows. The encoded matrices are shared by
+    all trials; each trial early-stops on a 20% validation split. Returns the best
+    classifier (trimmed to its best iteration) and the search metadata.
+    """
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=0.2, random_state=42, stratify=y_train)
+    trials = sample_trials(load_search_space(search_space), n_trials or settings.SEARCH_TRIALS)
+    logger.info(f"Hyperparameter search: {len(trials)} trials, {len(X_fit)} training / {len(X_val)} validation rows")
+
+    result = run_search(
+        X_fit, y_fit, X_val, y_val,
+        trials, workers or settings.SEARCH_WORKERS or os.cpu_count() or 1,
+        settings.SEARCH_MAX_ESTIMATORS, settings.SEARCH_EARLY_STOPPING_ROUNDS
+    )
+    best = result["best"]
+
+    # Keep only the trees up to the best iteration, so every scoring path (including
+    # raw booster calls) sees the early-stopped model
+    n_trees = best["best_iteration"] + 1
+    classifier = XGBClassifier(**{**BASE_PARAMS, **best["params"], "n_estimators": n_trees})
+    classifier.load_model(best["classifier"].get_booster()[:n_trees].save_raw("json"))
+
+    metadata = {
+        "training_mode": "search",
+        "params": best["params"],
+        "n_trees": n_trees,
+        "val_roc_auc": best["val_roc_auc"],
+        "search": {k: v for k, v in result.items() if k != "best"}
+    }
+    return classifier, metadata
+
+class _EncodedChunkIter(xgb.DataIter):
+    """
+    Streams a labeled CSV to XGBoost chunk by chunk, encoded with an already-fitted
+    preprocessor, so external-memory training never holds the whole file in RAM.
+    """
+
+    def __init__(self, path: str, preprocessor, chunk_size: int, cache_dir: str):
+        self.path = path
+        self.preprocessor = preprocessor
+        self.chunk_size = chunk_size
+        self.n_rows = 0
+        self._chunks = None
+        super().__init__(cache_prefix=os.path.join(cache_dir, "train"))
+
+    def reset(self):
+        self._chunks = None
+
+    def next(self, input_data) -> bool:
+        if self._chunks is None:
+            self._chunks = pd.read_csv(self.path, chunksize=self.chunk_size, dtype=CSV_DTYPES)
+            self.n_rows = 0
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        chunk = preprocess_data(clean_frame(chunk))
+        input_data(data=_encode(self.preprocessor, chunk.drop(columns=['Churn'])), label=chunk['Churn'].to_numpy())
+        self.n_rows += len(chunk)
+        return True
+
+def _encode(preprocessor, X: pd.DataFrame) -> np.ndarray:
+    # Dense like the pipeline path: sparse input would make XGBoost treat the one-hot zeros as missing
+    X = preprocessor.transform(X)
+    return X.toarray() if hasattr(X, 'toarray') else np.asarray(X)
+
+def fit_incremental(base_model: Pipeline, X: pd.DataFrame = None, y=None, rounds: int = 50, data_path: str = None,
+                    chunk_size: int = None):
+    """
+    Continues boosting the fitted `base_model` pipeline by `rounds` trees. Returns the new
+    pipeline, which reuses the already-fitted preprocessor as-is, and the number of rows trained on.
+
+    Trains on the in-memory `X`/`y`, or with `data_path` streams that labeled CSV in chunks
+    into an XGBoost external-memory matrix, for label files larger than RAM.
+    """
+    preprocessor = base_model.named_steps['preprocessor']
+    base_classifier = base_model.named_steps['classifier']
+    classifier = XGBClassifier(**{**base_classifier.get_params(), "n_estimators": rounds})
+
+    if data_path is None:
+        classifier.fit(_encode(preprocessor, X), y, xgb_model=base_classifier.get_booster())
+        n_rows = len(X)
+    else:
+        with tempfile.TemporaryDirectory(prefix="xgb-extmem-") as cache_dir:
+            chunks = _EncodedChunkIter(data_path, preprocessor, chunk_size or settings.BATCH_CHUNK_SIZE, cache_dir)
+            dtrain = xgb.ExtMemQuantileDMatrix(chunks)
+            booster = xgb.train(base_classifier.get_xgb_params(), dtrain, num_boost_round=rounds,
+                                xgb_model=base_classifier.get_booster())
+            # Release the page cache before its directory is removed
+            del dtrain
+            n_rows = chunks.n_rows
+        classifier.load_model(booster.save_raw("json"))
+
+    return Pipeline(steps=[('preprocessor', preprocessor), ('classifier', classifier)]), n_rows
+
+def train_incremental(new_data_path: str, rounds: int = 50, external_memory: bool = False,
+                      eval_path: str = None, chunk_size: int = None, activate: bool = True):
+    """
+    Continues training the active model on newly arrived labeled data instead of refitting
+    from scratch, then saves and publishes the result like `train_model`.
+
+    Evaluation uses `eval_path` if given; otherwise 20% of the new data is held out
+    (in-memory mode only, external-memory runs without `eval_path` are not evaluated).
+    """
+    base = model_registry.get()
+    logger.info(f"Incremental training from model {base.version}: +{rounds} rounds on {new_data_path}")
+
+    X_test = y_test = None
+    if eval_path:
+        eval_df = preprocess_data(load_data(eval_path, use_cache=False))
+        X_test, y_test = eval_df.drop(columns=['Churn']), eval_df['Churn']
+
+    t0 = time.perf_counter()
+    if external_memory:
+        model, n_train_rows = fit_incremental(base.pipeline, rounds=rounds, data_path=new_data_path, chunk_size=chunk_size)
+    else:
+        df = preprocess_data(load_data(new_data_path, use_cache=False))
+        X, y = df.drop(columns=['Churn']), df['Churn']
+        if X_test is None:
+            X, X_test, y, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        model, n_train_rows = fit_incremental(base.pipeline, X, y, rounds=rounds)
+    train_time_s = time.perf_counter() - t0
+    logger.info(f"Incremental training finished in {train_time_s:.2f}s on {n_train_rows} rows")
+
+    roc_auc = evaluate_model(model, X_test, y_test, base.threshold) if X_test is not None else None
+    version = save_model(model, {
+        "training_mode": "incremental_external_memory" if external_memory else "incremental",
+        "base_version": base.version,
+        "decision_threshold": base.metadata.get("decision_threshold", base.threshold),
+        "roc_auc": roc_auc,
+        "features": base.metadata.get("features") or base.preprocessor.feature_names_in_.tolist(),
+        "n_train_rows": int(n_train_rows),
+        "n_trees": model.named_steps['classifier'].get_booster().num_boosted_rounds(),
+        "train_time_s": train_time_s
+    }, activate=activate)
+
+    return model, roc_auc, version
+
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Train the churn model.")
+    parser.add_argument("--search", action="store_true", help="Run a hyperparameter search and promote the best trial")
+    parser.add_argument("--trials", type=int, help="Number of search trials (default: SEARCH_TRIALS)")
+    parser.add_argument("--workers", type=int, help="Search worker processes (default: SEARCH_WORKERS or CPU count)")
+    parser.add_argument("--search-space", help="JSON file of {param: [values]} (default: app.ml.search.DEFAULT_SEARCH_SPACE)")
+    parser.add_argument("--incremental", metavar="CSV", help="Continue boosting the active model on this labeled file")
+    parser.add_argument("--rounds", type=int, default=50, help="Boosting rounds to add in incremental mode")
+    parser.add_argument("--external-memory", action="store_true", help="Stream the incremental data through XGBoost external memory")
+    parser.add_argument("--eval", dest="eval_path", help="Labeled file to evaluate the incremental model on")
+    args = parser.parse_args()
+
+    if args.incremental:
+        train_incremental(args.incremental, rounds=args.rounds, external_memory=args.external_memory, eval_path=args.eval_path)
+    else:
+        train_model(search=args.search, n_trials=args.trials, workers=args.workers, search_space=args.search_space)
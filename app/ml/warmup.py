@@ -0,0 +1,73 @@
+import threading
+import time
+from app.core.config import settings
+from app.core.logger import logger
+from app.ml.registry import model_registry
+from app.explainability.shap_explainer import shap_service
+
+WARMUP_MODES = ("background", "blocking", "lazy")
+
+class ModelWarmup:
+    """
+    Loads the model and builds the explainer after the server starts, so importing the app
+    (and answering /health) never waits for sklearn, xgboost, shap or the model artifact.
+
+    Modes (STARTUP_WARMUP): "background" runs the steps in a daemon thread, "blocking" runs
+    them inside the startup event (the old behaviour), "lazy" skips them and lets the first
+    requests load what they need. `ready` backs the /ready endpoint.
+    """
+
+    def __init__(self, steps, mode: str = None):
+        self.steps = steps
+        self.mode = mode or settings.STARTUP_WARMUP
+        if self.mode not in WARMUP_MODES:
+            raise ValueError(f"Unknown STARTUP_WARMUP {self.mode!r}, expected one of {WARMUP_MODES}")
+        self._status = {name: {"state": "pending"} for name, _ in steps}
+        self._thread = None
+        self._started_at = None
+        self._finished_at = None
+
+    @property
+    def ready(self) -> bool:
+        if self.mode == "lazy":
+            return True
+        return all(step["state"] == "done" for step in self._status.values())
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        if self.mode == "blocking":
+            self._run()
+        elif self.mode == "background" and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        for name, step in self.steps:
+            self._status[name] = {"state": "running"}
+            t0 = time.perf_counter()
+            try:
+                step()
+                self._status[name] = {"state": "done", "seconds": round(time.perf_counter() - t0, 3)}
+            except Exception as e:
+                # Not ready; requests can still try to load on demand
+                self._status[name] = {"state": "failed", "error": str(e)}
+                logger.error(f"Warmup step {name} failed: {e}")
+        self._finished_at = time.perf_counter()
+        logger.info(f"Warmup finished in {self._finished_at - self._started_at:.2f}s (ready: {self.ready})")
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "mode": self.mode,
+            "steps": self._status,
+            "seconds": round(self._finished_at - self._started_at, 3) if self._finished_at else None
+        }
+
+def _warm_model():
+    model_registry.get().warmup()
+
+model_warmup = ModelWarmup([
+    ("model", _warm_model),
+    # Builds the TreeExplainer (imports shap) now rather than on the first /explain request
+    ("explainer", shap_service.warmup)
+])
@@ -136,11 +136,12 @@ def main():
         # 2. Call API with Spinner
         with st.spinner("Analyzing data models..."):
             time.sleep(0.5) # Slight delay for UX
-            result = call_api("predict", payload)
+            # Prediction, explanation and strategy in one round trip
+            result = call_api("analyze", payload)
         
         if result:
-            prob = result['churn_probability']
-            churn_risk = prob > 0.5
+            prob = result['prediction']['churn_probability']
+            churn_risk = result['prediction']['churn_prediction'] == 1
             
             # --- TOP METRICS ROW ---
             st.markdown("### Analysis Results")
@@ -184,8 +185,7 @@ def main():
                 
             with c2:
                 st.subheader("Key Drivers")
-                # Explanation API
-                explain = call_api("explain", payload)
+                explain = result.get('explanation')
                 if explain:
                     imp = explain['feature_importance']
                     
@@ -209,7 +209,7 @@ def main():
             # --- STRATEGY ROW ---
             st.markdown("### 🤖 Recommended Strategy")
             try:
-                retention = requests.post(f"{API_URL}/retention", params={"churn_prob": prob}, json=list(imp.keys())).json()
+                retention = result['retention']
                 
                 with st.expander(f"Strategy: {retention['strategy']}", expanded=True):
                     for item in retention['action_items']:
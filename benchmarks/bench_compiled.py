@@ -0,0 +1,96 @@
+"""
+Compares the compiled NumPy scorer with the pickled pipeline: worker startup time and peak
+RSS (fresh interpreter: imports + model load + first prediction), per-call latency, and
+probability parity on rows sampled from the dataset.
+
+    python -m benchmarks.bench_compiled --rows 1000 --repeat 200 --output bench_compiled.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.data.loader import clean_frame
+from app.ml.registry import model_registry
+
+# Each snippet boots a worker the way its serving mode does and scores one record
+STARTUP_SNIPPETS = {
+    "pipeline": (
+        "from app.ml.predict import predictor\n"
+        "from app.explainability.shap_explainer import shap_service\n"
+        "predictor.predict_record(record)"
+    ),
+    "compiled": (
+        "from app.ml.registry import model_registry\n"
+        "model_registry.load_compiled().predict_records([record])"
+    )
+}
+
+def _startup(snippet: str, record: dict) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "t = time.perf_counter()\n"
+        f"record = json.loads({json.dumps(json.dumps(record))})\n"
+        f"{snippet}\n"
+        "seconds = time.perf_counter() - t\n"
+        "heavy = [m for m in ('pandas', 'sklearn', 'xgboost', 'shap') if m in sys.modules]\n"
+        # VmHWM (peak RSS of this process image); ru_maxrss would carry over the parent's peak
+        "hwm_kb = int([l for l in open('/proc/self/status') if l.startswith('VmHWM')][0].split()[1])\n"
+        "print(json.dumps({'seconds': seconds, 'max_rss_mb': hwm_kb / 1024, 'heavy_imports': heavy}))"
+    )
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return float(np.median(timings)) * 1000
+
+def run(n_rows: int, repeat: int) -> dict:
+    df = clean_frame(pd.read_csv(settings.DATA_PATH)).drop(columns=['customerID', 'Churn'], errors='ignore')
+    records = df.sample(n=n_rows, replace=True, random_state=42).to_dict('records')
+    record = records[0]
+
+    bundle = model_registry.get()
+    compiled = model_registry.load_compiled(bundle.version)
+
+    expected = bundle.pipeline.predict_proba(pd.DataFrame(records))[:, 1]
+    actual = compiled.predict_records(records)
+
+    return {
+        "startup": {mode: _startup(snippet, record) for mode, snippet in STARTUP_SNIPPETS.items()},
+        "latency_ms": {
+            "pipeline_single": _median_ms(lambda: bundle.classifier.predict_proba(bundle.encoder.encode(record)), repeat),
+            "compiled_single": _median_ms(lambda: compiled.predict_records([record]), repeat),
+            "pipeline_batch": _median_ms(lambda: bundle.classifier.predict_proba(bundle.encoder.encode_many(records)), max(1, repeat // 20)),
+            "compiled_batch": _median_ms(lambda: compiled.predict_records(records), max(1, repeat // 20)),
+            "batch_rows": n_rows
+        },
+        "parity": {
+            "rows": n_rows,
+            "max_abs_diff": float(np.max(np.abs(expected - actual))),
+            "label_mismatches": int(np.sum((expected > bundle.threshold) != (actual > bundle.threshold)))
+        },
+        "model": {"version": compiled.version, "n_trees": compiled.n_trees, "max_depth": compiled.max_depth}
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Write results as JSON to this file (default: stdout)")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
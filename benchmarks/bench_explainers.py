@@ -0,0 +1,71 @@
+"""
+Compares the SHAP explanation backends: shap.TreeExplainer vs XGBoost pred_contribs.
+
+    python -m benchmarks.bench_explainers --rows 1 100 1000 --repeat 5 --output bench_explainers.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.ml.registry import model_registry
+from app.explainability.shap_explainer import ShapExplainer
+
+def _import_time_s(module: str) -> float:
+    """
+    Wall time to import `module` in a fresh interpreter.
+    """
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+def _sample_matrix(bundle, n_rows: int) -> np.ndarray:
+    df = pd.read_csv(settings.DATA_PATH).drop(columns=['customerID', 'Churn'], errors='ignore')
+    df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce').fillna(0)
+    sample = df.sample(n=n_rows, replace=True, random_state=42)
+    return np.asarray(bundle.preprocessor.transform(sample), dtype=np.float64)
+
+def run(row_counts, repeat: int) -> dict:
+    bundle = model_registry.get()
+    explainers = {backend: ShapExplainer(backend=backend) for backend in ("shap", "xgboost")}
+
+    results = {"import_time_s": {m: _import_time_s(m) for m in ("shap", "xgboost")}, "runs": [], "parity": []}
+    for n_rows in row_counts:
+        X = _sample_matrix(bundle, n_rows)
+        values = {}
+        for backend, explainer in explainers.items():
+            values[backend] = explainer.contributions(bundle, X)  # warmup (builds TreeExplainer)
+            timings = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                explainer.contributions(bundle, X)
+                timings.append(time.perf_counter() - t0)
+            results["runs"].append({
+                "backend": backend,
+                "rows": n_rows,
+                "median_s": float(np.median(timings)),
+                "rows_per_s": n_rows / float(np.median(timings))
+            })
+        results["parity"].append({
+            "rows": n_rows,
+            "max_abs_diff": float(np.max(np.abs(values["shap"] - values["xgboost"])))
+        })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file (default: stdout)")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
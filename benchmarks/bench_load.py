@@ -0,0 +1,124 @@
+"""
+In-process HTTP load generator: replays a JSONL file of requests against the FastAPI app
+(through httpx's ASGI transport, so no server or network is involved) at each target
+concurrency and reports throughput and latency percentiles.
+
+Each payload line is either `{"method": "POST", "path": "/api/v1/explain", "body": {...}}`
+or a bare customer record, which is sent to `--endpoint`. Without `--payloads`, records
+sampled from DATA_PATH are posted to `--endpoint`; `--write-payloads` saves them as a
+starting point for a custom mix.
+
+    python -m benchmarks.bench_load --payloads payloads.jsonl --concurrency 1 8 32 --requests 2000 --output bench_load.json
+"""
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+import pandas as pd
+import httpx
+from app.core.config import settings
+from app.data.loader import clean_frame
+from benchmarks.bench_micro import environment
+
+def sample_payloads(n: int, endpoint: str) -> list:
+    df = clean_frame(pd.read_csv(settings.DATA_PATH)).drop(columns=['Churn'], errors='ignore')
+    records = df.sample(n=n, replace=True, random_state=42).to_dict('records')
+    return [{"method": "POST", "path": endpoint, "body": record} for record in records]
+
+def load_payloads(path: str, endpoint: str) -> list:
+    payloads = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "body" not in item and "path" not in item:
+                item = {"body": item}
+            payloads.append({"method": item.get("method", "POST"), "path": item.get("path", endpoint), "body": item.get("body")})
+    if not payloads:
+        raise ValueError(f"No payloads in {path}")
+    return payloads
+
+def _summary(latencies_s: list, statuses: list, wall_s: float) -> dict:
+    latencies_ms = np.asarray(latencies_s) * 1000
+    counts = {}
+    for status in statuses:
+        counts[str(status)] = counts.get(str(status), 0) + 1
+    return {
+        "requests": len(statuses),
+        "errors": sum(1 for status in statuses if status >= 400),
+        "status_counts": counts,
+        "wall_s": wall_s,
+        "rps": len(statuses) / wall_s if wall_s else 0.0,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max())
+    }
+
+async def _send(client, payload):
+    return await client.request(payload["method"], payload["path"], json=payload["body"])
+
+async def _run_level(client, payloads: list, concurrency: int, n_requests: int) -> dict:
+    latencies, statuses = [], []
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < n_requests:
+            payload = payloads[next_index % len(payloads)]
+            next_index += 1
+            t0 = time.perf_counter()
+            response = await _send(client, payload)
+            latencies.append(time.perf_counter() - t0)
+            statuses.append(response.status_code)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"concurrency": concurrency, **_summary(latencies, statuses, time.perf_counter() - t0)}
+
+async def _run(payloads: list, concurrencies: list, n_requests: int, warmup: int) -> dict:
+    from app.main import app
+
+    # lifespan_context runs the startup/shutdown handlers, which the ASGI transport does not
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.05)
+            for payload in payloads[:warmup]:
+                await _send(client, payload)
+            levels = [await _run_level(client, payloads, c, n_requests) for c in concurrencies]
+            stats = (await client.get("/api/v1/stats")).json()
+    return {"levels": levels, "stats": stats}
+
+def run(payloads: list, concurrencies: list, n_requests: int, warmup: int) -> dict:
+    results = asyncio.run(_run(payloads, concurrencies, n_requests, warmup))
+    endpoints = sorted({f"{p['method']} {p['path']}" for p in payloads})
+    return {"environment": environment(), "payloads": len(payloads), "endpoints": endpoints, **results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payloads", help="JSONL file of requests to replay (default: records sampled from DATA_PATH)")
+    parser.add_argument("--endpoint", default="/api/v1/predict", help="Path for bare customer records")
+    parser.add_argument("--sample", type=int, default=1000, help="Records to sample when no --payloads is given")
+    parser.add_argument("--write-payloads", help="Write the sampled payloads to this JSONL file and exit")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--output", help="Write results as JSON to this file (default: stdout)")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads, args.endpoint) if args.payloads else sample_payloads(args.sample, args.endpoint)
+    if args.write_payloads:
+        with open(args.write_payloads, "w") as f:
+            f.writelines(json.dumps(payload) + "\n" for payload in payloads)
+    else:
+        results = run(payloads, args.concurrency, args.requests, args.warmup)
+        payload = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(payload)
+        else:
+            print(payload)
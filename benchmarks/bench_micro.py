@@ -0,0 +1,111 @@
+"""
+Micro-benchmarks for the serving and training code paths across row counts: prediction
+(`ChurnPredictor.predict` / `predict_record` for one row, `predict_batch` for many), SHAP
+explanations (`ShapExplainer.explain_local` / `explain_records`, explanation cache off),
+`load_data` (cold and Parquet-cached) and training (`prepare_training_data` plus the
+classifier fit that `train_model` runs, without publishing a model).
+
+Rows are sampled with replacement from DATA_PATH. Results are JSON, tagged with the git
+commit, so runs from two commits can be diffed.
+
+    python -m benchmarks.bench_micro --rows 1 100 1000 10000 --repeat 20 --output bench_micro.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.data.loader import load_data, clean_frame
+from app.ml.predict import ChurnPredictor
+from app.ml.registry import model_registry
+from app.ml.train import prepare_training_data, build_classifier
+from app.explainability.shap_explainer import ShapExplainer
+
+# Below this the stratified 80/20 split in prepare_training_data is not meaningful
+MIN_TRAIN_ROWS = 50
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "git_commit": commit or None,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "explainer_backend": settings.EXPLAINER_BACKEND,
+        "tree_method": settings.TRAIN_TREE_METHOD
+    }
+
+def _timings_ms(fn, repeat: int) -> dict:
+    fn()  # warmup
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return {"median_ms": float(np.median(timings)), "min_ms": float(np.min(timings)), "repeat": repeat}
+
+def _train(path: str):
+    data = prepare_training_data(path, use_cache=False)
+    return build_classifier().fit(data.dense(data.X_train), data.y_train)
+
+def run(row_counts, repeat: int) -> dict:
+    source = clean_frame(pd.read_csv(settings.DATA_PATH))
+    predictor = ChurnPredictor(cache=LRUCache(0))
+    explainer = ShapExplainer()
+    explainer.cache = LRUCache(0)
+    bundle = model_registry.get()
+    explainer.warmup()
+
+    workdir = tempfile.mkdtemp(prefix="bench-micro-")
+    settings.DATA_CACHE_DIR = os.path.join(workdir, "data-cache")
+    # Fits and batch explanations are expensive; scale their repeats down
+    slow_repeat = max(1, repeat // 10)
+    results = {"environment": environment(), "model_version": bundle.version, "runs": []}
+    try:
+        for n_rows in row_counts:
+            sample = source.sample(n=n_rows, replace=True, random_state=42).reset_index(drop=True)
+            features = sample.drop(columns=['customerID', 'Churn'], errors='ignore')
+            records = features.to_dict('records')
+            path = os.path.join(workdir, f"rows_{n_rows}.csv")
+            sample.to_csv(path, index=False)
+
+            run_result = {"rows": n_rows}
+            if n_rows == 1:
+                run_result["predict"] = _timings_ms(lambda: predictor.predict(features), repeat)
+                run_result["predict_record"] = _timings_ms(lambda: predictor.predict_record(records[0]), repeat)
+                run_result["explain_local"] = _timings_ms(lambda: explainer.explain_local(features), repeat)
+            else:
+                run_result["predict_batch"] = _timings_ms(lambda: predictor.predict_batch(features), repeat)
+                run_result["explain_records"] = _timings_ms(lambda: explainer.explain_records(records), slow_repeat)
+            run_result["load_data_cold"] = _timings_ms(lambda: load_data(path, use_cache=False), repeat)
+            run_result["load_data_cached"] = _timings_ms(lambda: load_data(path), repeat)
+            if n_rows >= MIN_TRAIN_ROWS and sample['Churn'].nunique() > 1:
+                run_result["train"] = _timings_ms(lambda: _train(path), slow_repeat)
+            results["runs"].append(run_result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to this file (default: stdout)")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
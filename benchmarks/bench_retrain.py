@@ -0,0 +1,82 @@
+"""
+Compares a full retrain against incremental (warm-start) training on newly arrived labels.
+
+A base model is fitted on `--base`. The full retrain refits from scratch on base + new rows;
+the incremental runs continue boosting the base model on the new rows only, in memory and
+through XGBoost external memory. All models are scored on the same held-out set.
+
+    python -m benchmarks.bench_retrain --new data/churn_2024_06.csv --rounds 50 --output bench_retrain.json
+"""
+import argparse
+import json
+import time
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import roc_auc_score
+from app.core.config import settings
+from app.data.loader import load_data, preprocess_data
+from app.ml.train import build_pipeline, fit_incremental
+
+def _xy(df: pd.DataFrame):
+    return df.drop(columns=['Churn']), df['Churn']
+
+def _timed(fit):
+    t0 = time.perf_counter()
+    result = fit()
+    return result, time.perf_counter() - t0
+
+def _report(model, seconds: float, X_test, y_test) -> dict:
+    return {
+        "train_time_s": seconds,
+        "roc_auc": float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])),
+        "n_trees": model.named_steps['classifier'].get_booster().num_boosted_rounds()
+    }
+
+def run(base_path: str, new_path: str, eval_path: str, rounds: int, chunk_size: int) -> dict:
+    X_base, y_base = _xy(preprocess_data(load_data(base_path, use_cache=False)))
+    X_new, y_new = _xy(preprocess_data(load_data(new_path, use_cache=False)))
+    if eval_path:
+        X_test, y_test = _xy(preprocess_data(load_data(eval_path, use_cache=False)))
+        streamed_path = new_path
+    else:
+        X_new, X_test, y_new, y_test = train_test_split(X_new, y_new, test_size=0.2, random_state=42, stratify=y_new)
+        streamed_path = None
+
+    base_model, base_s = _timed(lambda: build_pipeline(X_base).fit(X_base, y_base))
+    full_model, full_s = _timed(lambda: build_pipeline(X_base).fit(
+        pd.concat([X_base, X_new], ignore_index=True), pd.concat([y_base, y_new], ignore_index=True)
+    ))
+    (incremental_model, _), incremental_s = _timed(lambda: fit_incremental(base_model, X_new, y_new, rounds=rounds))
+
+    results = {
+        "rows": {"base": len(X_base), "new": len(X_new), "eval": len(X_test)},
+        "rounds": rounds,
+        "base": _report(base_model, base_s, X_test, y_test),
+        "full_retrain": _report(full_model, full_s, X_test, y_test),
+        "incremental": _report(incremental_model, incremental_s, X_test, y_test)
+    }
+    # External memory streams the whole --new file, so it only runs when the eval set is separate
+    if streamed_path:
+        (external_model, _), external_s = _timed(
+            lambda: fit_incremental(base_model, rounds=rounds, data_path=streamed_path, chunk_size=chunk_size)
+        )
+        results["incremental_external_memory"] = _report(external_model, external_s, X_test, y_test)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base", default=settings.DATA_PATH, help="Labeled data the base model is fitted on")
+    parser.add_argument("--new", required=True, help="Newly arrived labeled data")
+    parser.add_argument("--eval", help="Held-out labeled data (default: 20%% of --new)")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=settings.BATCH_CHUNK_SIZE)
+    parser.add_argument("--output", help="Write results as JSON to this file (default: stdout)")
+    args = parser.parse_args()
+
+    results = run(args.base, args.new, args.eval, args.rounds, args.chunk_size)
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
@@ -0,0 +1,69 @@
+"""
+API cold start: import-time profile of `app.main` and, per STARTUP_WARMUP mode, the time
+until the app is imported, answers /health and reports /ready (each in a fresh interpreter).
+
+    python -m benchmarks.bench_startup --top 15 --modes background blocking --output bench_startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+TIMELINE_SCRIPT = """
+import json, sys, time
+t = time.perf_counter()
+import app.main
+from fastapi.testclient import TestClient
+imported = time.perf_counter() - t
+heavy = [m for m in ('pandas', 'sklearn', 'xgboost', 'shap') if m in sys.modules]
+with TestClient(app.main.app) as client:
+    client.get('/health')
+    health = time.perf_counter() - t
+    while client.get('/ready').status_code != 200:
+        time.sleep(0.01)
+    ready = time.perf_counter() - t
+print(json.dumps({'import_s': imported, 'health_s': health, 'ready_s': ready, 'heavy_imports_at_import': heavy}))
+"""
+
+def import_profile(module: str, top: int) -> dict:
+    """
+    Parses `python -X importtime` output: total time and the `top` modules by cumulative time.
+    """
+    out = subprocess.run([sys.executable, "-W", "ignore", "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    total = next((r["cumulative_ms"] for r in rows if r["module"] == module), None)
+    return {"total_ms": total, "top": sorted(rows, key=lambda r: -r["cumulative_ms"])[:top]}
+
+def timeline(mode: str) -> dict:
+    env = {**os.environ, "STARTUP_WARMUP": mode}
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", TIMELINE_SCRIPT],
+                         capture_output=True, text=True, check=True, env=env)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def run(top: int, modes: list) -> dict:
+    return {
+        "import_profile": import_profile("app.main", top),
+        "timeline": {mode: timeline(mode) for mode in modes}
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--modes", nargs="+", default=["background", "blocking"])
+    parser.add_argument("--output", help="Write results as JSON to this file (default: stdout)")
+    args = parser.parse_args()
+
+    results = run(args.top, args.modes)
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
@@ -0,0 +1,34 @@
+import os
+import joblib
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.data.loader import clean_frame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIPPED_MODEL = os.path.join(ROOT, "models", "churn_model.pkl")
+
+@pytest.fixture(scope="session")
+def pipeline():
+    """
+    The model shipped in models/ (served as version "legacy").
+    """
+    return joblib.load(SHIPPED_MODEL)
+
+@pytest.fixture(scope="session")
+def preprocessor(pipeline):
+    return pipeline.named_steps['preprocessor']
+
+@pytest.fixture(scope="session")
+def customers(preprocessor) -> pd.DataFrame:
+    """
+    The bundled CSV, cleaned like the API and training paths, with the model's input columns.
+    """
+    df = clean_frame(pd.read_csv(os.path.join(ROOT, settings.DATA_PATH)))
+    return df[list(preprocessor.feature_names_in_)]
+
+def with_unknown_categories(records: list, columns: list) -> list:
+    """
+    Copies of `records` where one categorical column per record holds a value unseen in training.
+    """
+    return [{**record, columns[i % len(columns)]: "__unknown__"} for i, record in enumerate(records)]
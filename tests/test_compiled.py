@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.data.synthetic import SyntheticCustomerGenerator
+from app.ml.compiled import CompiledModel, compile_pipeline, export_compiled
+from conftest import ROOT, with_unknown_categories
+
+ATOL = 1e-5
+
+@pytest.fixture(scope="module")
+def compiled(pipeline):
+    return CompiledModel(compile_pipeline(pipeline))
+
+def _assert_parity(pipeline, compiled, records, columns):
+    expected = pipeline.predict_proba(pd.DataFrame(records, columns=columns))[:, 1]
+    np.testing.assert_allclose(compiled.predict_records(records), expected, rtol=0, atol=ATOL)
+
+def test_parity_on_bundled_rows(pipeline, compiled, customers):
+    _assert_parity(pipeline, compiled, customers.to_dict('records'), customers.columns)
+
+def test_parity_on_synthetic_rows(pipeline, compiled, customers):
+    synthetic = SyntheticCustomerGenerator(pd.read_csv(os.path.join(ROOT, settings.DATA_PATH))).sample(5000)
+    _assert_parity(pipeline, compiled, synthetic[customers.columns].to_dict('records'), customers.columns)
+
+def test_parity_with_missing_values(pipeline, compiled, customers):
+    records = customers.head(300).to_dict('records')
+    numeric = compiled.encoder.numerical_cols
+    categorical = compiled.encoder.categorical_cols
+    for i, record in enumerate(records):
+        record[numeric[i % len(numeric)]] = np.nan
+        if i % 3 == 0:
+            record[categorical[i % len(categorical)]] = None
+    _assert_parity(pipeline, compiled, records, customers.columns)
+
+def test_parity_with_unknown_categories(pipeline, compiled, customers):
+    records = with_unknown_categories(customers.head(300).to_dict('records'), compiled.encoder.categorical_cols)
+    _assert_parity(pipeline, compiled, records, customers.columns)
+
+def test_exported_artifact_round_trips(pipeline, customers, tmp_path):
+    path = export_compiled(pipeline, str(tmp_path / "model.pkl"))
+    assert path is not None
+    _assert_parity(pipeline, CompiledModel.load(path), customers.head(500).to_dict('records'), customers.columns)
+
+def test_compiled_app_does_not_import_ml_stack():
+    code = (
+        "import sys, app.main_compiled; "
+        "print('imported:', [m for m in ('pandas', 'sklearn', 'xgboost', 'shap') if m in sys.modules])"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert "imported: []" in result.stdout.splitlines()
@@ -0,0 +1,34 @@
+import numpy as np
+from app.ml.encoder import FeatureEncoder, build_encoder
+from conftest import with_unknown_categories
+
+def _transform(preprocessor, frame):
+    X = preprocessor.transform(frame)
+    return X.toarray() if hasattr(X, 'toarray') else np.asarray(X, dtype=np.float64)
+
+def test_build_encoder_for_shipped_model(preprocessor):
+    encoder = build_encoder(preprocessor)
+    assert encoder is not None
+    assert encoder.n_features == len(preprocessor.get_feature_names_out())
+
+def test_encode_many_matches_transform(preprocessor, customers):
+    encoder = FeatureEncoder.from_preprocessor(preprocessor)
+    records = customers.to_dict('records')
+    np.testing.assert_allclose(encoder.encode_many(records), _transform(preprocessor, customers), rtol=0, atol=1e-9)
+
+def test_encode_matches_encode_many(preprocessor, customers):
+    encoder = FeatureEncoder.from_preprocessor(preprocessor)
+    records = customers.head(20).to_dict('records')
+    np.testing.assert_array_equal(np.vstack([encoder.encode(r) for r in records]), encoder.encode_many(records))
+
+def test_unknown_categories_match_transform(preprocessor, customers):
+    import pandas as pd
+
+    encoder = FeatureEncoder.from_preprocessor(preprocessor)
+    records = with_unknown_categories(customers.head(200).to_dict('records'), encoder.categorical_cols)
+    expected = _transform(preprocessor, pd.DataFrame(records, columns=customers.columns))
+    np.testing.assert_allclose(encoder.encode_many(records), expected, rtol=0, atol=1e-9)
+
+def test_probe_records_pass_parity_check(preprocessor):
+    encoder = FeatureEncoder.from_preprocessor(preprocessor)
+    assert encoder.check_parity(preprocessor)